@@ -1,7 +1,7 @@
 import json
 import os
 from logger import logger
-from openai import AsyncClient
+from agents.client import client_registry
 
 MODULE_DESCRIPTION = """
 information_retrieval
@@ -110,9 +110,7 @@ async def classify(query):
     model = os.getenv("OPENAI_MODEL")
 
     try:
-        async_client = AsyncClient(
-            api_key=os.environ["OPENAI_API_KEY"],
-        )
+        async_client = client_registry.get_client("classifier")
 
         # Request a completion from the OpenAI API
         response = await async_client.chat.completions.create(
@@ -122,7 +120,6 @@ async def classify(query):
             temperature=0.0,
         )
         response = json.loads(response.choices[0].message.content)
-        await async_client.close()
         logger.info(f"Classification result: {response}")
         return response
     except Exception as e:
@@ -0,0 +1,66 @@
+import os
+import httpx
+from openai import AsyncClient, DefaultAsyncHttpxClient
+from logger import logger
+
+# Per-agent request timeouts in seconds, overridable through the environment
+AGENT_TIMEOUTS = {
+    "classifier": float(os.getenv("OPENAI_TIMEOUT_CLASSIFIER", "15")),
+    "create_query": float(os.getenv("OPENAI_TIMEOUT_CREATE_QUERY", "20")),
+    "generate_response": float(os.getenv("OPENAI_TIMEOUT_GENERATE_RESPONSE", "60")),
+    "metadata": float(os.getenv("OPENAI_TIMEOUT_METADATA", "60")),
+}
+
+
+class OpenAIClientRegistry:
+    """Create a Singleton OpenAI AsyncClient shared by all agents.
+
+    The client owns a single pooled HTTP connection pool, so every LLM hop reuses
+    warm keep-alive connections instead of paying for a new TLS handshake.
+    """
+
+    _instance = None
+    _client = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def open(self) -> None:
+        """Open the shared client if it is not open yet."""
+        if self._client is not None:
+            return
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30")),
+        )
+        self._client = AsyncClient(
+            api_key=os.environ["OPENAI_API_KEY"],
+            http_client=DefaultAsyncHttpxClient(limits=limits),
+        )
+        logger.info("Opened shared OpenAI client.")
+
+    async def close(self) -> None:
+        """Close the shared client and its connection pool."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            logger.info("Closed shared OpenAI client.")
+
+    def get_client(self, agent: str) -> AsyncClient:
+        """Get the shared client configured with the timeout for the given agent.
+
+        Args:
+            agent (str): Name of the agent making the call, used to pick its timeout.
+
+        Returns:
+            AsyncClient: A client view sharing the pooled HTTP connections.
+        """
+        # Scripts such as ingestion run without the FastAPI lifespan
+        self.open()
+        return self._client.with_options(timeout=AGENT_TIMEOUTS.get(agent, 60.0))
+
+
+client_registry = OpenAIClientRegistry()
@@ -1,28 +1,35 @@
 import os
 import json
 import asyncio
-from openai import AsyncClient
+from agents.client import client_registry
 from logger import logger
 import sys
 
 # Suppress encoding errors globally
 sys.stdout.reconfigure(errors='ignore')
 
-create_query_prompt = """
+# Closed vocabulary of the inventory sheet, shared with the rule-based fast path
+MIN_FLOOR = 1
+MAX_FLOOR = 21
+UNIT_TYPES = ["1 Bed + Study", "2 Bed", "2 Bed + Study", "3 Bed", "3 Bed + Study", "4 Bed"]
+VIEWS = ['Pool', 'City']
+SOLD_VALUES = ['Yes', 'No']
+
+create_query_prompt = f"""
 Here are the columns in pandas:
 
 Columns - Data Type - Unique Values (Example Values)
-Floor - INT - Strcictly value between 1 to 21 inclusive.
+Floor - INT - Strcictly value between {MIN_FLOOR} to {MAX_FLOOR} inclusive.
 Stack/series - INT - [1, 2, 3, 4, 5, 6, 7, 8]	
 Unit number	- INT - Example value : 100
-Unit type - STR - ["1 Bed + Study", "2 Bed", "2 Bed + Study", "3 Bed", "3 Bed + Study", "4 Bed"]
+Unit type - STR - {json.dumps(UNIT_TYPES)}
 Area (sq ft.) - INT - Example value : 667	
-View - STR - ['Pool', 'City']	
+View - STR - {VIEWS}	
 Price - INT - Example value in Dollars: 1273000	
 Parking count - INT - [0,1,2]	
 Parking Slot size - STR - ['2.5 * 4 meter', '2.5 * 5 meter']
 Parking level - STR-  ['Basement', 'Level 1', 'Level 2', 'Level 3', 'Level 4', 'Level 5']	
-Sold? - STR -  ['Yes', 'No']
+Sold? - STR -  {SOLD_VALUES}
 
 The dataframe is df and exmaple query is  "SELECT * FROM df WHERE `Sold?` = 'No'"
 
@@ -37,9 +44,7 @@ async def create_query(text):
     model = os.getenv("OPENAI_MODEL")
 
     try:
-        async_client = AsyncClient(
-            api_key=os.environ["OPENAI_API_KEY"],
-        )
+        async_client = client_registry.get_client("create_query")
 
         # Request a completion from the OpenAI API
         response = await async_client.chat.completions.create(
@@ -50,7 +55,6 @@ async def create_query(text):
         response_text = response.choices[0].message.content
         # Clean up the response by removing code block backticks and the "sql" keyword
         cleaned_response = response_text.replace("```sql", "").replace("```", "").strip()
-        await async_client.close()
         logger.info(f"Created query: {cleaned_response}")
         return cleaned_response
     except Exception as e:
@@ -0,0 +1,174 @@
+import re
+import threading
+from typing import Optional
+from agents.create_query import MIN_FLOOR, MAX_FLOOR, UNIT_TYPES, VIEWS
+from logger import logger
+
+NUMBER_WORDS = {"one": "1", "two": "2", "three": "3", "four": "4"}
+
+# Matches "2 bed", "2-bed", "two bedroom", "3 bhk + study", "1 bed and study"
+UNIT_TYPE_PATTERN = re.compile(
+    r"\b(\d|one|two|three|four)\s*-?\s*(?:bed|beds|bedroom|bedrooms|bhk|br)\b"
+    r"(\s*(?:\+|and|with|plus)\s*(?:a\s+)?study)?"
+)
+FLOOR_RANGE_PATTERN = re.compile(
+    r"\b(?:on\s+)?floors?\s+(\d{1,2})\s*(?:-|to|and)\s*(\d{1,2})\b"
+    r"|\bbetween\s+floors?\s+(\d{1,2})\s+(?:and|to)\s+(\d{1,2})\b"
+)
+FLOOR_BOUND_PATTERN = re.compile(
+    r"\b(above|over|below|under)\s+(?:the\s+)?(?:floor\s+(\d{1,2})|(\d{1,2})(?:st|nd|rd|th)?\s+floor)\b"
+)
+FLOOR_EXACT_PATTERN = re.compile(
+    r"\b(?:on\s+)?(?:the\s+)?(?:floor\s+(\d{1,2})|(\d{1,2})(?:st|nd|rd|th)?\s+floor)\b"
+)
+# "pool view", "city-facing", "facing the pool", "views of the city"; a bare "pool"/"city" is
+# only read as the View slot when another inventory slot is present (see _parse)
+VIEW_PATTERN = re.compile(
+    r"\b(?:(?:facing|overlooking|views?\s+(?:of|over|on))\s+(?:the\s+)?(pool|city)\b"
+    r"|(pool|city)(\s*-?\s*(?:view|views|facing))?\b)"
+)
+UNSOLD_PATTERN = re.compile(r"\b(?:unsold|not\s+(?:yet\s+)?sold|available|vacant|remaining|for\s+sale)\b")
+SOLD_PATTERN = re.compile(r"\b(?:already\s+)?sold(?:\s+out)?\b")
+COUNT_PATTERN = re.compile(r"\bhow\s+many\b|\bcount\s+(?:of\s+)?|\bnumber\s+of\b")
+
+# Words that may surround the slots without changing the meaning of the query.
+# Anything outside this list (prices, parking, area, taxes...) sends the query to the LLM.
+# "details"/"about" are left out on purpose: such questions are answered from the brochure.
+FILLER_WORDS = {
+    "a", "all", "an", "and", "any", "apartment", "apartments", "are", "at", "can",
+    "currently", "different", "do", "does", "facing", "find", "flat", "flats", "for", "get",
+    "give", "have", "having", "home", "homes", "in", "is", "list", "me", "of", "on", "or",
+    "please", "properties", "property", "see", "show", "still", "that", "the", "there",
+    "type", "types", "unit", "units", "view", "views", "what", "which", "with",
+}
+
+class InventoryFastPath:
+    """Deterministic intent/slot parser for common inventory questions.
+
+    Questions built only from the closed vocabulary of the inventory sheet
+    (unit type, view, floor, sold status, "how many") are turned straight into
+    SQL without calling the LLM. When any part of the question is not
+    understood the parser returns None and the caller falls back to
+    `classify` and `create_query`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits = 0
+
+    @staticmethod
+    def _unit_type(number: str, study: bool) -> Optional[str]:
+        """Map a parsed bedroom count to a unit type from the sheet, or None if it does not exist."""
+        unit_type = f"{NUMBER_WORDS.get(number, number)} Bed" + (" + Study" if study else "")
+        return unit_type if unit_type in UNIT_TYPES else None
+
+    @staticmethod
+    def _floor(value: str) -> Optional[int]:
+        floor = int(value)
+        return floor if MIN_FLOOR <= floor <= MAX_FLOOR else None
+
+    def _parse(self, text: str) -> Optional[str]:
+        text = " ".join(text.lower().replace("?", " ").replace(",", " ").replace(".", " ").split())
+        conditions = []
+
+        count = COUNT_PATTERN.search(text) is not None
+        text = COUNT_PATTERN.sub(" ", text)
+
+        unit_types = []
+        for match in UNIT_TYPE_PATTERN.finditer(text):
+            unit_type = self._unit_type(match.group(1), bool(match.group(2)))
+            if unit_type is None:
+                return None
+            if unit_type not in unit_types:
+                unit_types.append(unit_type)
+        text = UNIT_TYPE_PATTERN.sub(" ", text)
+        if len(unit_types) == 1:
+            conditions.append(f"`Unit type` = '{unit_types[0]}'")
+        elif unit_types:
+            conditions.append("`Unit type` IN (" + ", ".join(f"'{u}'" for u in unit_types) + ")")
+
+        match = FLOOR_RANGE_PATTERN.search(text)
+        if match:
+            low, high = [self._floor(v) for v in match.groups() if v is not None]
+            if low is None or high is None:
+                return None
+            conditions.append(f"`Floor` BETWEEN {min(low, high)} AND {max(low, high)}")
+            text = FLOOR_RANGE_PATTERN.sub(" ", text)
+        else:
+            match = FLOOR_BOUND_PATTERN.search(text)
+            if match:
+                floor = self._floor(match.group(2) or match.group(3))
+                if floor is None:
+                    return None
+                operator = ">" if match.group(1) in ("above", "over") else "<"
+                conditions.append(f"`Floor` {operator} {floor}")
+                text = FLOOR_BOUND_PATTERN.sub(" ", text)
+            else:
+                match = FLOOR_EXACT_PATTERN.search(text)
+                if match:
+                    floor = self._floor(match.group(1) or match.group(2))
+                    if floor is None:
+                        return None
+                    conditions.append(f"`Floor` = {floor}")
+                    text = FLOOR_EXACT_PATTERN.sub(" ", text)
+
+        if UNSOLD_PATTERN.search(text):
+            conditions.append("`Sold?` = 'No'")
+            text = UNSOLD_PATTERN.sub(" ", text)
+        elif SOLD_PATTERN.search(text):
+            conditions.append("`Sold?` = 'Yes'")
+            text = SOLD_PATTERN.sub(" ", text)
+
+        matches = list(VIEW_PATTERN.finditer(text))
+        views = {(m.group(1) or m.group(2)).capitalize() for m in matches}
+        if len(views) > 1 or not views <= set(VIEWS):
+            return None
+        # "Is there a pool?" is an amenity question, not a View filter
+        qualified = any(m.group(1) or m.group(3) for m in matches)
+        if views and not qualified and not conditions:
+            return None
+        if views:
+            conditions.append(f"`View` = '{views.pop()}'")
+        text = VIEW_PATTERN.sub(" ", text)
+
+        # Every remaining word must be filler; numbers or unknown words mean we are unsure
+        if any(word not in FILLER_WORDS for word in text.split()):
+            return None
+        if not conditions and not count:
+            return None
+
+        select = "SELECT COUNT(*) AS `Count` FROM df" if count else "SELECT * FROM df"
+        if conditions:
+            return f"{select} WHERE " + " AND ".join(conditions)
+        return select
+
+    def parse(self, text: str) -> Optional[str]:
+        """Parse an inventory question into SQL without calling the LLM.
+
+        Args:
+            text (str): The user query.
+
+        Returns:
+            Optional[str]: SQL for the inventory table, or None if the parser is unsure.
+        """
+        sql_query = self._parse(str(text))
+        with self._lock:
+            self.attempts += 1
+            if sql_query is not None:
+                self.hits += 1
+        if sql_query is not None:
+            logger.info(f"Fast path created query: {sql_query}")
+        return sql_query
+
+    def stats(self) -> dict:
+        """Return attempts, hits and the hit rate of the fast path."""
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.attempts if self.attempts else 0.0,
+            }
+
+
+inventory_fast_path = InventoryFastPath()
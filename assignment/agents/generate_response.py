@@ -1,7 +1,7 @@
 import os
 import json
 import asyncio
-from openai import AsyncClient
+from agents.client import client_registry
 from logger import logger
 import sys
 
@@ -25,9 +25,7 @@ async def generate_response(text):
     model = os.getenv("OPENAI_MODEL")
 
     try:
-        async_client = AsyncClient(
-            api_key=os.environ["OPENAI_API_KEY"],
-        )
+        async_client = client_registry.get_client("generate_response")
 
         # Request a completion from the OpenAI API
         response = await async_client.chat.completions.create(
@@ -36,7 +34,6 @@ async def generate_response(text):
             temperature=0.0,
         )
         response_text = (response.choices[0].message.content)
-        await async_client.close()
         logger.info("Response Generated")
         return response_text
     except Exception as e:
@@ -1,7 +1,7 @@
 import os
 import json
 import asyncio
-from openai import AsyncClient
+from agents.client import client_registry
 import sys
 from logger import logger
 
@@ -42,9 +42,7 @@ async def create_metadata(text):
     model = os.getenv("OPENAI_MODEL")
 
     try:
-        async_client = AsyncClient(
-            api_key=os.environ["OPENAI_API_KEY"],
-        )
+        async_client = client_registry.get_client("metadata")
 
         # Request a completion from the OpenAI API
         response = await async_client.chat.completions.create(
@@ -54,7 +52,6 @@ async def create_metadata(text):
             temperature=0.0,
         )
         response = json.loads(response.choices[0].message.content)
-        await async_client.close()
         logger.info(response)
         return response
     except Exception as e:
@@ -0,0 +1,282 @@
+import ast
+import json
+import os
+import re
+import threading
+from typing import Optional
+import numpy as np
+from agents.classifier import EXAMPLES, MODULE_DESCRIPTION
+from vector_store.embedding import OpenAIEmbeddingModel
+from logger import logger
+
+MODULES = ["information_retrieval", "inventory", "None"]
+
+# Labels used by the example headers in agents/classifier.py
+EXAMPLE_LABELS = {
+    "INFORMATION RETRIEVAL": "information_retrieval",
+    "INVENTORY": "inventory",
+    "NONE": "None",
+}
+
+# Hand-labelled queries disjoint from the seed utterances, used by `evaluate_margins`
+# to pick ROUTER_MIN_MARGIN
+EVALUATION_QUERIES = [
+    ("How is stamp duty calculated on a new apartment?", "information_retrieval"),
+    ("What payment plans does the developer offer?", "information_retrieval"),
+    ("Is there an early bird discount for this launch?", "information_retrieval"),
+    ("Tell me about the amenities listed in the brochure", "information_retrieval"),
+    ("What does the catalogue say about the 2 bedroom layout?", "information_retrieval"),
+    ("Explain the deferred payment scheme", "information_retrieval"),
+    ("What is the property tax rate for residential units?", "information_retrieval"),
+    ("Describe the location and nearby schools of the project", "information_retrieval"),
+    ("What are the terms of the purchase agreement?", "information_retrieval"),
+    ("Which features come with the penthouse according to the listing?", "information_retrieval"),
+    ("Which units on the 12th floor are still available?", "inventory"),
+    ("How many 3 bedroom units are reserved?", "inventory"),
+    ("What is the price of unit 05-12?", "inventory"),
+    ("List all unsold units with a pool view", "inventory"),
+    ("How many parking slots does unit 10-03 have?", "inventory"),
+    ("Show the square footage of every 2 bedroom unit in stack 4", "inventory"),
+    ("Which parking level is assigned to unit 08-07?", "inventory"),
+    ("What is the cheapest available unit?", "inventory"),
+    ("Has the price of the 1 bedroom units changed?", "inventory"),
+    ("How many units are sold in block B?", "inventory"),
+    ("What is the weather like today?", "None"),
+    ("Can you recommend a good restaurant nearby?", "None"),
+    ("Should I buy bitcoin or gold?", "None"),
+    ("Write me a poem about the sea", "None"),
+    ("What does a mortgage broker do in general?", "None"),
+    ("Who won the football match yesterday?", "None"),
+    ("How do I reset my email password?", "None"),
+    ("Translate hello into French", "None"),
+]
+
+# Candidate values of ROUTER_MIN_MARGIN compared by `evaluate_margins`
+EVALUATION_MARGINS = (0.0, 0.02, 0.04, 0.06, 0.08, 0.1, 0.15)
+# Larger than any cosine gap, so every query is escalated; unlike inf it stays valid JSON in /stats
+NO_LOCAL_ROUTING = 2.0
+
+
+def seed_utterances() -> list[tuple[str, str]]:
+    """Collect labelled example utterances from the classifier prompt.
+
+    Returns:
+        list[tuple[str, str]]: (utterance, module) pairs taken from the
+        `user_message` lists in EXAMPLES and the bullet points of MODULE_DESCRIPTION.
+    """
+    seeds = []
+    for header, body in re.findall(r"Example \d+ - ([A-Za-z ]+?) Messages:(.*?)(?=Example \d+ -|\Z)", EXAMPLES, re.S):
+        module = EXAMPLE_LABELS[header.strip().upper()]
+        for messages in re.findall(r'\{"user_message": (\[.*?\])\}', body):
+            seeds.extend((message, module) for message in ast.literal_eval(messages))
+
+    module = None
+    for line in MODULE_DESCRIPTION.splitlines():
+        line = line.strip()
+        if line in MODULES:
+            module = line
+        elif line.startswith("- ") and module is not None:
+            seeds.append((line[2:], module))
+    return seeds
+
+
+class IntentRouter:
+    """Route queries to a module by comparing the query embedding with per-module centroids.
+
+    Centroids are built from the example utterances of the classifier prompt
+    and refined with logged traffic that the LLM classifier labelled. When the
+    best module does not beat the runner-up by at least `min_margin` the router
+    returns None and the caller escalates to the LLM `classify`. The "None"
+    module is never decided locally: a refusal is cached, so it is always left
+    to the LLM. Unless `min_margin` is given, `build` calibrates it on
+    EVALUATION_QUERIES: the smallest candidate margin under which no query is
+    routed to the wrong module, or no local routing at all if every candidate
+    makes mistakes.
+    """
+
+    def __init__(
+        self,
+        min_margin: Optional[float] = float(os.getenv("ROUTER_MIN_MARGIN")) if os.getenv("ROUTER_MIN_MARGIN") else None,
+        traffic_path: Optional[str] = os.getenv("ROUTER_TRAFFIC_PATH"),
+    ) -> None:
+        """
+        Initialize the router.
+
+        Args:
+            min_margin (float): (Optional) minimum cosine gap between the best and second best module;
+                calibrated by `build` when not given.
+            traffic_path (str): (Optional) JSONL file where labelled traffic is logged and reloaded from.
+        """
+        self.embedding = OpenAIEmbeddingModel()
+        self.min_margin = min_margin
+        self.calibrate = min_margin is None
+        self.traffic_path = traffic_path
+        self._lock = threading.Lock()
+        self._sums: dict[str, np.ndarray] = {}
+        self._counts: dict[str, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self.routed = 0
+        self.escalated = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _add(self, module: str, embedding) -> None:
+        vector = self._normalize(embedding)
+        if module in self._sums:
+            self._sums[module] += vector
+            self._counts[module] += 1
+        else:
+            self._sums[module] = vector.copy()
+            self._counts[module] = 1
+
+    def _refresh_centroids(self) -> None:
+        if all(module in self._sums for module in MODULES):
+            self._centroids = np.stack([self._normalize(self._sums[module]) for module in MODULES])
+
+    @property
+    def ready(self) -> bool:
+        """Whether centroids exist for every module."""
+        return self._centroids is not None
+
+    def build(self) -> None:
+        """Embed the seed utterances, replay logged traffic and compute the centroids."""
+        seeds = seed_utterances()
+        embeddings = self.embedding.embed_documents([text for text, _ in seeds])
+        with self._lock:
+            self._sums, self._counts = {}, {}
+            for (_, module), embedding in zip(seeds, embeddings):
+                self._add(module, embedding)
+            logged = 0
+            if self.traffic_path and os.path.exists(self.traffic_path):
+                with open(self.traffic_path) as file:
+                    for line in file:
+                        record = json.loads(line)
+                        if record.get("module") in MODULES:
+                            self._add(record["module"], record["embedding"])
+                            logged += 1
+            self._refresh_centroids()
+        logger.info(f"Intent router built from {len(seeds)} seed and {logged} logged utterances.")
+        if self.calibrate:
+            safe = [result["min_margin"] for result in self.evaluate() if not result["wrong"]]
+            self.min_margin = min(safe) if safe else NO_LOCAL_ROUTING
+            logger.info(f"Intent router calibrated min_margin to {self.min_margin}.")
+
+    def _closest(self, centroids: np.ndarray, embedding) -> tuple[str, float]:
+        """Return the closest module and its cosine margin over the runner-up."""
+        scores = centroids @ self._normalize(embedding)
+        order = np.argsort(scores)[::-1]
+        return MODULES[order[0]], float(scores[order[0]] - scores[order[1]])
+
+    def route(self, embedding) -> Optional[str]:
+        """Pick a module for the query embedding, or None to escalate.
+
+        Escalates while the centroids are not built, when the margin is below
+        `min_margin`, and whenever the closest module is "None".
+
+        Args:
+            embedding: Embedding of the user query.
+
+        Returns:
+            Optional[str]: The module name, or None to escalate to the LLM classifier.
+        """
+        centroids = self._centroids
+        module, margin = self._closest(centroids, embedding) if centroids is not None else (None, 0.0)
+        with self._lock:
+            if module is None or module == "None" or self.min_margin is None or margin < self.min_margin:
+                self.escalated += 1
+                return None
+            self.routed += 1
+        logger.info(f"Intent router picked {module} with margin {margin:.4f}.")
+        return module
+
+    def evaluate(
+        self,
+        labelled: list[tuple[str, str]] = EVALUATION_QUERIES,
+        margins: tuple = EVALUATION_MARGINS,
+    ) -> list[dict]:
+        """Measure local routing coverage and accuracy per candidate margin.
+
+        Builds the router first if needed. Queries labelled "None" count as
+        errors when they are routed locally to any module.
+
+        Args:
+            labelled (list[tuple[str, str]]): (query, expected module) pairs.
+            margins (tuple): Values of `min_margin` to compare.
+
+        Returns:
+            list[dict]: Per margin, the share of queries routed locally and how many of those were wrong.
+        """
+        if not self.ready:
+            self.build()
+        embeddings = self.embedding.embed_documents([query for query, _ in labelled])
+        decisions = [self._closest(self._centroids, embedding) for embedding in embeddings]
+        results = []
+        for min_margin in margins:
+            routed = [
+                (module, expected)
+                for (module, margin), (_, expected) in zip(decisions, labelled)
+                if module != "None" and margin >= min_margin
+            ]
+            wrong = sum(module != expected for module, expected in routed)
+            results.append(
+                {
+                    "min_margin": min_margin,
+                    "routed_share": len(routed) / len(labelled),
+                    "wrong": wrong,
+                    "accuracy": (len(routed) - wrong) / len(routed) if routed else 1.0,
+                }
+            )
+        return results
+
+    def observe(self, query: str, embedding, module: str) -> None:
+        """Learn from a query the LLM classifier labelled and log it for future builds."""
+        if module not in MODULES:
+            return
+        with self._lock:
+            self._add(module, embedding)
+            self._refresh_centroids()
+            if self.traffic_path:
+                with open(self.traffic_path, "a") as file:
+                    file.write(json.dumps({"query": query, "module": module, "embedding": list(map(float, embedding))}) + "\n")
+
+    def stats(self) -> dict:
+        """Return routed/escalated counters and the number of utterances per module."""
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "min_margin": self.min_margin,
+                "routed": self.routed,
+                "escalated": self.escalated,
+                "utterances": dict(self._counts),
+            }
+
+
+intent_router = IntentRouter()
+
+
+def evaluate_margins() -> None:
+    """Print routing coverage and accuracy for each candidate ROUTER_MIN_MARGIN.
+
+    The smallest margin without a wrong local decision keeps LLM calls
+    lowest at no accuracy cost; it is what `build` calibrates to when
+    ROUTER_MIN_MARGIN is unset. Needs OpenAI access for the embeddings.
+    """
+    results = intent_router.evaluate()
+    for result in results:
+        print(
+            f"min_margin {result['min_margin']:.2f}: {result['routed_share']:.0%} routed locally, "
+            f"{result['wrong']} wrong ({result['accuracy']:.0%} accurate)"
+        )
+    safe = [result["min_margin"] for result in results if not result["wrong"]]
+    if safe:
+        print(f"Smallest margin without local mistakes: {min(safe):.2f}")
+    else:
+        print("Every candidate margin made local mistakes; route everything through the LLM.")
+
+
+if __name__ == "__main__":
+    evaluate_margins()
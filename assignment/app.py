@@ -1,19 +1,57 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from pymongo.errors import OperationFailure
 from agents.classifier import classify
 from agents.create_query import create_query
-from execute_query import execute_query_on_csv
+from agents.fast_path import inventory_fast_path
+from agents.router import intent_router
+from execute_query import aexecute_query_on_csv, inventory_result_cache
 from agents.generate_response import generate_response
+from agents.client import client_registry
+from inventory_engine import inventory_engine
+from concurrency import run_blocking, run_blocking_with_retry, shutdown_executor
 from vector_store.atlas_vector import AtlasVectorStore
+from vector_store.facets import query_facet_extractor
 from logger import logger
 from cache.mongodb_cache import MongoDBSemanticCache
+from cache.cache_writer import SemanticCacheWriter
+from query_context import QueryContext
+from context_builder import context_builder
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Share one pooled OpenAI client across all agents for the app lifetime
+    client_registry.open()
+    cache_writer.start()
+    # Parse the inventory sheet in the background; a missing sheet must not stop the API,
+    # and execute_query_on_csv still loads it on first use
+    inventory_load = asyncio.create_task(run_blocking_with_retry(inventory_engine.load, "Inventory sheet load"))
+    inventory_watcher = asyncio.create_task(inventory_engine.watch())
+    # Centroids are built in the background; until then every query escalates to the LLM
+    router_build = asyncio.create_task(run_blocking_with_retry(intent_router.build, "Intent router build"))
+    # Until the facet vocabulary is loaded retrieval runs unfiltered
+    facet_load = asyncio.create_task(run_blocking_with_retry(query_facet_extractor.load, "Facet vocabulary load"))
+    yield
+    facet_load.cancel()
+    router_build.cancel()
+    inventory_watcher.cancel()
+    inventory_load.cancel()
+    # Flush queued cache writes before the process exits
+    await cache_writer.stop()
+    # The cache writer's last flush ran on the pool, so it can be released now
+    shutdown_executor()
+    await client_registry.close()
 
 
 avs = AtlasVectorStore()
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 semantic_cache=MongoDBSemanticCache(
             score_threshold=0.97
         )
+cache_writer = SemanticCacheWriter(semantic_cache)
 
 
 # Add CORS middleware
@@ -30,36 +68,106 @@ app.add_middleware(
 def ping():
     return {"ping": "pong"}    
 
+@app.get("/fast_path/stats")
+def fast_path_stats():
+    return {
+        "inventory": inventory_fast_path.stats(),
+        "router": intent_router.stats(),
+        "facets": query_facet_extractor.stats(),
+    }
+
+@app.post("/admin/inventory/reload")
+async def reload_inventory():
+    try:
+        await run_blocking(inventory_engine.reload, True)
+        return {"inventory_version": inventory_engine.version}
+    except Exception as e:
+        logger.error(f"Exception occured while reloading inventory: {e}")
+        return {"message": "Error reloading inventory", "details": str(e)}
+
+@app.post("/admin/facets/reload")
+async def reload_facets():
+    try:
+        await run_blocking(query_facet_extractor.load)
+        return {"facets": query_facet_extractor.stats()}
+    except Exception as e:
+        logger.error(f"Exception occured while reloading facets: {e}")
+        return {"message": "Error reloading facets", "details": str(e)}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {"l1": semantic_cache.l1.stats(), "inventory": inventory_result_cache.stats()}
+
 @app.post("/query")
 async def submit_query(query):
     try:
         logger.info(f"Processing query: {query}")
+
+        # Exact repeats are answered in-process before any embedding or network I/O
+        exact_response = semantic_cache.lookup_exact(query, llm_string="gpt-4o-mini")
+        if exact_response is not None:
+            return {"bot_response": exact_response}
+
+        # Embed the query once and reuse it for every lookup and insert below
+        context = QueryContext(query)
         
         # If no exact match, check semantic match in MongoDB
-        semantic_response = semantic_cache.lookup(query, llm_string="gpt-4o-mini")
+        semantic_response = await semantic_cache.alookup_by_vector(
+            query, llm_string="gpt-4o-mini", embedding=await context.aget_embedding()
+        )
         if semantic_response:
             logger.info("Semantic cache hit for query.")
             return {"bot_response": semantic_response}
         
-        response = await classify(query)
-        classification = response["classifications"][0]["module"]
+        # Common inventory questions are parsed to SQL without any LLM call
+        sql_query = inventory_fast_path.parse(query)
+        if sql_query is not None:
+            classification = "inventory"
+        else:
+            # The query embedding is already computed, so local routing is nearly free
+            classification = intent_router.route(await context.aget_embedding())
+            if classification is None:
+                response = await classify(query)
+                classification = response["classifications"][0]["module"]
+                await run_blocking(intent_router.observe, query, await context.aget_embedding(), classification)
         
         if classification == "information_retrieval":
-            results = avs.retrieve(query=query)
+            # Facets named in the query narrow the search to chunks with matching metadata
+            pre_filter = query_facet_extractor.pre_filter(query)
+            try:
+                results = await avs.aretrieve_by_vector(
+                    embedding=await context.aget_embedding(), pre_filter=pre_filter, with_score=True
+                )
+            except OperationFailure as e:
+                if not pre_filter:
+                    raise
+                # e.g. the index does not declare the facet fields; answer without the filter
+                logger.error(f"Filtered vector search failed, retrying without pre_filter: {e}")
+                results = []
+            if pre_filter and not results:
+                results = await avs.aretrieve_by_vector(embedding=await context.aget_embedding(), with_score=True)
             logger.info(f"Length of results: {len(results)}")
-            merged_text = " ".join(doc.page_content for doc in results)
+            # Ranked, deduplicated and packed into the token budget instead of joining every chunk
+            merged_text = context_builder.build(results)
             logger.info("Sending text to generate bot response")
             bot_response = await generate_response(merged_text)
-            semantic_cache.update(query, llm_string="gpt-4o-mini", response=bot_response)
+            cache_writer.submit(
+                query, llm_string="gpt-4o-mini", response=bot_response, embedding=await context.aget_embedding()
+            )
             return {"bot_response": bot_response}
         elif classification == "inventory":
-            sql_query = await create_query(query)
-            markdown_text = execute_query_on_csv(sql_query)
-            semantic_cache.update(query, llm_string="gpt-4o-mini", response=markdown_text)
+            if sql_query is None:
+                sql_query = await create_query(query)
+            markdown_text = await aexecute_query_on_csv(sql_query)
+            cache_writer.submit(
+                query, llm_string="gpt-4o-mini", response=markdown_text, embedding=await context.aget_embedding()
+            )
             return {"bot_response": markdown_text}
         else:
             bot_response = "Sorry, I don't have information for that query. Would you like to call a human?"
-            semantic_cache.update(query, llm_string="gpt-4o-mini", response=bot_response)
+            cache_writer.submit(
+                query, llm_string="gpt-4o-mini", response=bot_response, embedding=await context.aget_embedding()
+            )
             return {"bot_response": bot_response}
     except Exception as e:
         logger.error(f"Exception occured while processing query: {e}")
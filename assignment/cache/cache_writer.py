@@ -0,0 +1,148 @@
+import asyncio
+import os
+from typing import Any, List, Optional
+from cache.mongodb_cache import MongoDBSemanticCache
+from query_context import normalize_query
+from logger import logger
+
+# Sentinel put on the queue to ask the writer loop to drain and exit
+_STOP = object()
+
+
+class SemanticCacheWriter:
+    """Background writer for the semantic cache.
+
+    Cache writes are queued instead of being awaited by the request, then
+    collected into batches that are embedded together (when no embedding was
+    supplied) and written with a single `insert_many`. Identical queries that
+    are queued at the same time are written only once.
+    """
+
+    def __init__(
+        self,
+        semantic_cache: MongoDBSemanticCache,
+        batch_size: int = int(os.getenv("CACHE_WRITER_BATCH_SIZE", "32")),
+        flush_interval: float = float(os.getenv("CACHE_WRITER_FLUSH_INTERVAL", "0.5")),
+        max_queue_size: int = int(os.getenv("CACHE_WRITER_MAX_QUEUE_SIZE", "1000")),
+    ) -> None:
+        """
+        Initialize the writer.
+
+        Args:
+            semantic_cache (MongoDBSemanticCache): Cache the entries are written to.
+            batch_size (int): Maximum number of entries written per `insert_many`.
+            flush_interval (float): Seconds to wait for a batch to fill before flushing it.
+            max_queue_size (int): Entries allowed to wait in the queue before new ones are dropped.
+        """
+        self.semantic_cache = semantic_cache
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: set[tuple[str, str]] = set()
+
+    def start(self) -> None:
+        """Start the background writer loop on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._task = asyncio.create_task(self._run())
+            logger.info("Semantic cache writer started.")
+
+    async def stop(self) -> None:
+        """Flush every queued entry and stop the writer loop."""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        self._queue = None
+        logger.info("Semantic cache writer stopped.")
+
+    def submit(
+        self,
+        user_query: str,
+        llm_string: str,
+        response: Any,
+        embedding: Optional[List[float]] = None,
+    ) -> bool:
+        """Queue a cache write without waiting for it.
+
+        Args:
+            user_query (str): The query being cached.
+            llm_string (str): The LLM identifier the response belongs to.
+            response (Any): The response to cache.
+            embedding (List[float]): (Optional) precomputed embedding of user_query.
+
+        Returns:
+            bool: True if the entry was queued, False if it was deduplicated or dropped.
+        """
+        if self._task is None:
+            logger.warning("Semantic cache writer is not running; dropping cache write.")
+            return False
+        key = (normalize_query(user_query), llm_string)
+        if key in self._pending:
+            return False
+        try:
+            self._queue.put_nowait((key, user_query, llm_string, response, embedding))
+        except asyncio.QueueFull:
+            logger.warning("Semantic cache writer queue is full; dropping cache write.")
+            return False
+        self._pending.add(key)
+        return True
+
+    async def _run(self) -> None:
+        """Collect queued entries into batches and flush them until stopped."""
+        stopping = False
+        while not stopping:
+            batch = []
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch.append(item)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+        # Drain anything queued behind the stop sentinel
+        remaining = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                remaining.append(item)
+        for start in range(0, len(remaining), self.batch_size):
+            await self._flush(remaining[start:start + self.batch_size])
+
+    async def _flush(self, batch: list) -> None:
+        """Embed entries that have no embedding yet and insert the batch."""
+        if not batch:
+            return
+        try:
+            missing = [i for i, item in enumerate(batch) if item[4] is None]
+            if missing:
+                embeddings = await self.semantic_cache.embedding.aembed_documents(
+                    [batch[i][1] for i in missing]
+                )
+                for i, embedding in zip(missing, embeddings):
+                    batch[i] = batch[i][:4] + (embedding,)
+            await self.semantic_cache.aupdate_many_by_vector(
+                [(user_query, llm_string, response, embedding)
+                 for _, user_query, llm_string, response, embedding in batch]
+            )
+            logger.info(f"Semantic cache writer flushed {len(batch)} entries.")
+        except Exception as e:
+            logger.error(f"Exception occured while flushing semantic cache writes: {e}")
+        finally:
+            for item in batch:
+                self._pending.discard(item[0])
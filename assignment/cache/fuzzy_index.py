@@ -0,0 +1,132 @@
+import math
+import threading
+from array import array
+from collections import defaultdict
+from typing import Optional
+from fuzzywuzzy import fuzz
+from logger import logger
+
+# Bigrams rather than trigrams: every edit destroys at most N grams, and with
+# N=3 the bound below stops pruning anything at the usual 85 threshold.
+N = 2
+
+
+def ngrams(text: str) -> set[str]:
+    """Distinct character n-grams of the text."""
+    return {text[i:i + N] for i in range(len(text) - N + 1)}
+
+
+class FuzzyQueryIndex:
+    """In-memory inverted n-gram index over cached queries for `fuzz.ratio` lookups.
+
+    `fuzz.ratio` is at most the LCS ratio 2*LCS/(la+lb), so a query of length
+    `la` can only reach `threshold` against strings whose length is within a
+    bounded range and which differ by at most (la+lb)*(1-r) insertions or
+    deletions. Each edit removes at most N of the query's n-grams, which gives
+    a minimum number of shared n-grams. Candidates are generated from the
+    posting lists of the query's rarest n-grams only (prefix filtering), pruned
+    by length and shared n-gram count, and only the survivors are scored.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._queries: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._postings: dict[str, array] = defaultdict(lambda: array("I"))
+        self._by_length: dict[int, array] = defaultdict(lambda: array("I"))
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def add(self, query: str) -> None:
+        """Index a cached query; queries already in the index are ignored."""
+        with self._lock:
+            self._add(query)
+
+    def _add(self, query: str) -> None:
+        if query in self._ids:
+            return
+        query_id = len(self._queries)
+        self._queries.append(query)
+        self._ids[query] = query_id
+        self._by_length[len(query)].append(query_id)
+        for gram in ngrams(query):
+            self._postings[gram].append(query_id)
+
+    def load(self, collection) -> None:
+        """Index every query of the cache collection, fetching only the query field."""
+        with self._lock:
+            for data in collection.find({}, {"query": 1, "_id": 0}):
+                if "query" in data:
+                    self._add(data["query"])
+            self.loaded = True
+        logger.info(f"Fuzzy query index loaded with {len(self._queries)} queries.")
+
+    def ensure_loaded(self, collection) -> None:
+        """Load the index from the collection on first use."""
+        if not self.loaded:
+            self.load(collection)
+
+    def _candidates(self, query: str, grams: set[str], ratio: float) -> set[int]:
+        """Ids of indexed queries that could reach `ratio` against the query."""
+        length = len(query)
+        max_length = math.floor(length * (2 - ratio) / ratio)
+        min_shared = len(grams) - N * math.floor((length + max_length) * (1 - ratio))
+        if min_shared <= 0:
+            # Too short for the n-gram bound; scan the plausible lengths instead
+            min_length = math.ceil(length * ratio / (2 - ratio))
+            return {
+                query_id
+                for other_length in range(min_length, max_length + 1)
+                for query_id in self._by_length.get(other_length, ())
+            }
+        # A candidate sharing min_shared grams must share one of the rarest len - min_shared + 1
+        rarest = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+        candidates = set()
+        for gram in rarest[:len(grams) - min_shared + 1]:
+            candidates.update(self._postings.get(gram, ()))
+        return candidates
+
+    def best_match(self, query: str, threshold: int = 85) -> Optional[tuple[str, int]]:
+        """Find the indexed query with the highest `fuzz.ratio` of at least `threshold`.
+
+        Args:
+            query (str): The user query.
+            threshold (int): Minimum `fuzz.ratio` score, from 0 to 100.
+
+        Returns:
+            Optional[tuple[str, int]]: The best matching cached query and its score, or None.
+        """
+        if not query:
+            return None
+        # fuzz.ratio rounds to an integer, so allow half a point of slack in the bounds
+        ratio = max(threshold - 0.5, 0.5) / 100
+        grams = ngrams(query)
+        length = len(query)
+        best_id, best_score, scored = None, 0, 0
+        with self._lock:
+            candidates = self._candidates(query, grams, ratio)
+            for query_id in sorted(candidates):
+                cached_query = self._queries[query_id]
+                other_length = len(cached_query)
+                if 2 * min(length, other_length) < ratio * (length + other_length):
+                    continue
+                max_edits = math.floor((length + other_length) * (1 - ratio))
+                if len(grams & ngrams(cached_query)) < len(grams) - N * max_edits:
+                    continue
+                scored += 1
+                score = fuzz.ratio(query, cached_query)
+                if score > best_score and score >= threshold:
+                    best_id, best_score = query_id, score
+            best_query = self._queries[best_id] if best_id is not None else None
+        logger.info(
+            f"Fuzzy index scored {scored} of {len(candidates)} candidates "
+            f"out of {len(self._queries)} cached queries."
+        )
+        if best_query is None:
+            return None
+        return best_query, best_score
+
+
+fuzzy_query_index = FuzzyQueryIndex()
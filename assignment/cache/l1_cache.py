@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from query_context import normalize_query
+
+
+class ExactMatchCache:
+    """In-process L1 cache for byte-identical repeats of a query.
+
+    Entries are keyed on the normalized query and the llm_string, evicted in
+    LRU order once the total size exceeds `max_bytes`, and expire after `ttl`
+    seconds. Lookups are served from memory with no network I/O.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = int(os.getenv("L1_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+        ttl: float = float(os.getenv("L1_CACHE_TTL_SECONDS", "3600")),
+    ) -> None:
+        """
+        Initialize the L1 cache.
+
+        Args:
+            max_bytes (int): Upper bound on the approximate size of all cached entries.
+            ttl (float): Seconds an entry stays valid after it was stored.
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], tuple[Any, float, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(user_query: str, llm_string: str) -> tuple[str, str]:
+        return normalize_query(user_query), llm_string
+
+    @staticmethod
+    def _size(key: tuple[str, str], response: Any) -> int:
+        """Approximate the memory held by an entry from its encoded text."""
+        return len(key[0].encode()) + len(key[1].encode()) + len(str(response).encode())
+
+    def get(self, user_query: str, llm_string: str) -> Optional[Any]:
+        """Return the cached response for the query or None on a miss."""
+        key = self._key(user_query, llm_string)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, user_query: str, llm_string: str, response: Any) -> None:
+        """Store a response, evicting least recently used entries to stay within max_bytes."""
+        key = self._key(user_query, llm_string)
+        size = self._size(key, response)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (response, time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, List, Optional
+import numpy as np
+from logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class LocalVectorIndex:
+    """Exact nearest-neighbour index over semantic cache entries, kept on local disk.
+
+    Normalized float32 embeddings live in a memory-mapped matrix
+    (`vectors.f32`) and the cached responses in an append-only JSONL file
+    (`entries.jsonl`) inside `path`. A lookup is a single matrix-vector
+    product, so near-duplicate queries are answered without a network round
+    trip. Scores use the same (1 + cosine) / 2 scale as Atlas `$vectorSearch`,
+    so the semantic cache threshold means the same thing for both.
+
+    Several processes (e.g. uvicorn workers) may share one `path`: appends
+    hold an exclusive `flock` on `path/lock` and first read the entries other
+    processes appended, so row i of the matrix always belongs to line i of
+    `entries.jsonl`. Where `fcntl` is unavailable each process gets its own
+    `path/<pid>` directory instead.
+    """
+
+    def __init__(self, path: str, initial_capacity: int = 1024) -> None:
+        """
+        Open or create the index.
+
+        Args:
+            path (str): Directory holding the index files.
+            initial_capacity (int): Rows allocated when the matrix file is created.
+        """
+        if fcntl is None:
+            path = os.path.join(path, str(os.getpid()))
+        self.path = path
+        self.initial_capacity = initial_capacity
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._entries_path = os.path.join(path, "entries.jsonl")
+        self._meta_path = os.path.join(path, "meta.json")
+        self._lock_path = os.path.join(path, "lock")
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        self._entries: List[dict] = []
+        # Bytes of entries.jsonl already read into _entries
+        self._entries_offset = 0
+        self.dim: Optional[int] = None
+        os.makedirs(path, exist_ok=True)
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+        if self._entries:
+            logger.info(f"Local semantic cache index loaded with {len(self._entries)} entries.")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Hold the inter-process lock on the index directory."""
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, "a") as file:
+            fcntl.flock(file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """Pick up entries and matrix growth written by other processes.
+
+        Rows are written before their entry line, so every complete line has
+        its row in place; a trailing line without a newline is an unfinished
+        insert and is not read.
+        """
+        if self.dim is None:
+            if not os.path.exists(self._meta_path):
+                return
+            with open(self._meta_path) as file:
+                self.dim = json.load(file)["dim"]
+        if os.path.getsize(self._entries_path) > self._entries_offset:
+            with open(self._entries_path, "rb") as file:
+                file.seek(self._entries_offset)
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break
+                    self._entries.append(json.loads(line))
+                    self._entries_offset += len(line)
+        capacity = os.path.getsize(self._vectors_path) // (4 * self.dim)
+        if self._matrix is None or capacity > self._matrix.shape[0]:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _ensure_capacity(self, rows: int, dim: int) -> None:
+        """Create or grow the matrix file (doubling) so it holds at least `rows` rows."""
+        if self.dim is None:
+            self.dim = dim
+            with open(self._meta_path, "w") as file:
+                json.dump({"dim": dim}, file)
+            open(self._entries_path, "w").close()
+            open(self._vectors_path, "w").close()
+        elif dim != self.dim:
+            raise ValueError(f"Embedding dimension {dim} does not match the index dimension {self.dim}.")
+        capacity = self._matrix.shape[0] if self._matrix is not None else 0
+        if rows <= capacity:
+            return
+        new_capacity = max(self.initial_capacity, capacity)
+        while new_capacity < rows:
+            new_capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+        with open(self._vectors_path, "ab") as file:
+            file.truncate(new_capacity * self.dim * 4)
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(new_capacity, self.dim))
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+    def add_many(self, entries: List[tuple]) -> None:
+        """Append cache entries to the index.
+
+        Args:
+            entries (List[tuple]): (user_query, llm_string, response, embedding) tuples.
+        """
+        if not entries:
+            return
+        vectors = self._normalize([entry[3] for entry in entries])
+        records = [
+            {"user_query": user_query, "llm_string": llm_string, "response": response}
+            for user_query, llm_string, response, _ in entries
+        ]
+        lines = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        with self._lock, self._file_lock(exclusive=True):
+            # Rows go after everything any process has appended so far
+            self._refresh()
+            start = len(self._entries)
+            self._ensure_capacity(start + len(entries), vectors.shape[1])
+            self._matrix[start:start + len(entries)] = vectors
+            self._matrix.flush()
+            with open(self._entries_path, "r+b") as file:
+                # Drops the partial line of an insert that crashed, which no reader has consumed
+                file.truncate(self._entries_offset)
+                file.seek(self._entries_offset)
+                file.write(lines)
+            self._entries.extend(records)
+            self._entries_offset += len(lines)
+
+    def add(self, user_query: str, llm_string: str, response: Any, embedding: List[float]) -> None:
+        """Append a single cache entry to the index."""
+        self.add_many([(user_query, llm_string, response, embedding)])
+
+    def search_many(self, embeddings, score_threshold: Optional[float] = None) -> List[Optional[tuple]]:
+        """Find the closest cached entry for each embedding with one batched dot product.
+
+        Args:
+            embeddings: Query embeddings.
+            score_threshold (float): (Optional) minimum (1 + cosine) / 2 score of a hit.
+
+        Returns:
+            List[Optional[tuple]]: (entry, score) per query, or None where nothing passes the threshold.
+        """
+        with self._lock:
+            # A stat per lookup; entries from other processes are read only when the file grew
+            if os.path.exists(self._entries_path) and os.path.getsize(self._entries_path) > self._entries_offset:
+                with self._file_lock(exclusive=False):
+                    self._refresh()
+            count = len(self._entries)
+            matrix, entries = self._matrix, self._entries
+        if not count:
+            return [None] * len(embeddings)
+        scores = (1 + matrix[:count] @ self._normalize(embeddings).T) / 2
+        best = np.argmax(scores, axis=0)
+        results = []
+        for column, row in enumerate(best):
+            score = float(scores[row, column])
+            if score_threshold and score < score_threshold:
+                results.append(None)
+            else:
+                results.append((entries[row], score))
+        return results
+
+    def search(self, embedding: List[float], score_threshold: Optional[float] = None) -> Optional[tuple]:
+        """Find the closest cached entry for a single embedding."""
+        return self.search_many([embedding], score_threshold)[0]
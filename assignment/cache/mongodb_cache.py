@@ -2,8 +2,13 @@ from typing import Optional, Any, List
 from langchain_core.documents import Document
 from langchain_community.vectorstores import MongoDBAtlasVectorSearch
 from vector_store.embedding import OpenAIEmbeddingModel
+from cache.l1_cache import ExactMatchCache
+from cache.local_vector_index import LocalVectorIndex
 import os
+import threading
+import time
 from logger import logger
+from concurrency import run_blocking
 
 class MongoDBSemanticCache:
     def __init__(
@@ -27,6 +32,17 @@ class MongoDBSemanticCache:
                 )
             )
         self.score_threshold = score_threshold
+        # Exact-match tier answered in-process before any vector search
+        self.l1 = ExactMatchCache()
+        # Emptiness is tracked here instead of counting the collection per lookup
+        self._has_documents = None
+        self._empty_checked_at = 0.0
+        self.empty_recheck_interval = float(os.getenv("CACHE_EMPTY_RECHECK_SECONDS", "30"))
+        # Optional on-disk exact-NN tier searched before Atlas
+        local_index_path = os.getenv("SEMANTIC_CACHE_LOCAL_INDEX_PATH")
+        self.local_index = LocalVectorIndex(local_index_path) if local_index_path else None
+        self._local_index_synced = self.local_index is None or len(self.local_index) > 0
+        self._local_index_lock = threading.Lock()
         self.LLM = "llm_string"
         self.RETURN_VAL = "response"
 
@@ -34,29 +50,135 @@ class MongoDBSemanticCache:
         """Convert text into its corresponding embedding."""
         return self.embedding.embed_query(text)
 
-    def _insert_document(self, user_query: str, llm_string: str, response: Any) -> None:
-        """Insert a document into the collection."""
-        embedding = self._embed_text(user_query)
+    def _to_document(
+        self, user_query: str, llm_string: str, response: Any, embedding: List[float]
+    ) -> dict:
+        """Build the raw collection document for a cache entry.
 
-        # Create a LangChain Document with metadata
+        Documents are written straight to the collection, bypassing
+        `add_documents`, which would embed the query again.
+        """
         document = Document(
-            page_content=user_query,  # or response depending on what you consider the "content"
+            page_content=user_query,
             metadata={
                 "user_query": user_query,
                 "llm_string": llm_string,
-                "embedding": embedding,
                 "response": response,
             }
         )
-        
-        self.vector_store.add_documents([document])
+
+        return {
+            self.vector_store._text_key: document.page_content,
+            self.vector_store._embedding_key: embedding,
+            **document.metadata,
+        }
+
+    def _insert_document(
+        self, user_query: str, llm_string: str, response: Any, embedding: List[float]
+    ) -> None:
+        """Insert a document with a precomputed embedding into the collection."""
+        self.vector_store._collection.insert_one(
+            self._to_document(user_query, llm_string, response, embedding)
+        )
+        self._has_documents = True
+        self.l1.put(user_query, llm_string, response)
+        if self.local_index is not None:
+            self.local_index.add(user_query, llm_string, response, embedding)
+
+    def _is_empty(self) -> bool:
+        """Check whether the cache collection holds no documents.
+
+        Once documents are known to exist this never touches the database again.
+        While the collection looks empty it is re-checked at most every
+        `empty_recheck_interval` seconds with `estimated_document_count`, which
+        reads collection metadata instead of scanning, so inserts made by other
+        workers are picked up.
+        """
+        if self._has_documents:
+            return False
+        now = time.monotonic()
+        if self._has_documents is None or now - self._empty_checked_at >= self.empty_recheck_interval:
+            self._has_documents = bool(self.vector_store._collection.estimated_document_count())
+            self._empty_checked_at = now
+        return not self._has_documents
+
+    def lookup_exact(self, user_query: str, llm_string: str) -> Optional[Any]:
+        """Look up a byte-identical (after normalization) query in the L1 tier only."""
+        return_val = self.l1.get(user_query, llm_string)
+        if return_val is not None:
+            logger.info("L1 cache hit for query.")
+        return return_val
 
     def lookup(self, user_query: str, llm_string: str) -> Optional[Any]:
         """Look up based on user_query and llm_string."""
-        if not self.vector_store._collection.count_documents({}):
-            logger.info("Collection is empty.")
+        return_val = self.lookup_exact(user_query, llm_string)
+        if return_val is not None:
+            return return_val
+        return self._lookup_embedding(user_query, llm_string, self._embed_text(user_query))
+
+    def lookup_by_vector(
+        self, user_query: str, llm_string: str, embedding: List[float]
+    ) -> Optional[Any]:
+        """Look up based on a precomputed embedding of user_query.
+
+        Callers holding an embedding have already been through `lookup_exact`,
+        so the L1 tier is only filled here, not consulted.
+        """
+        return self._lookup_embedding(user_query, llm_string, embedding)
+
+    def _lookup_embedding(
+        self, user_query: str, llm_string: str, embedding: List[float]
+    ) -> Optional[Any]:
+        """Search the local index, then Atlas on a local miss, and fill the faster tiers."""
+        return_val = self._search_local(embedding)
+        if return_val is None:
+            if self._is_empty():
+                logger.info("Collection is empty.")
+                return None
+            return_val = self._search(embedding)
+            # Remember the Atlas hit under this query's embedding for the next near-duplicate
+            if return_val is not None and self.local_index is not None:
+                self.local_index.add(user_query, llm_string, return_val, embedding)
+        if return_val is not None:
+            self.l1.put(user_query, llm_string, return_val)
+        return return_val
+
+    def _sync_local_index(self) -> None:
+        """Fill a new, empty local index from the entries already in the collection."""
+        with self._local_index_lock:
+            if self._local_index_synced:
+                return
+            projection = {
+                "_id": 0,
+                "user_query": 1,
+                "llm_string": 1,
+                self.RETURN_VAL: 1,
+                self.vector_store._embedding_key: 1,
+            }
+            entries = [
+                (doc.get("user_query"), doc.get("llm_string"), doc.get(self.RETURN_VAL), doc[self.vector_store._embedding_key])
+                for doc in self.vector_store._collection.find({}, projection)
+                if self.vector_store._embedding_key in doc
+            ]
+            self.local_index.add_many(entries)
+            self._local_index_synced = True
+            logger.info(f"Local semantic cache index filled with {len(entries)} entries from the collection.")
+
+    def _search_local(self, embedding: List[float]) -> Optional[Any]:
+        """Search the local index, if enabled, with the same score threshold as Atlas."""
+        if self.local_index is None:
+            return None
+        if not self._local_index_synced:
+            self._sync_local_index()
+        hit = self.local_index.search(embedding, self.score_threshold)
+        if hit is None:
             return None
-        
+        entry, score = hit
+        logger.info(f"Local semantic cache hit for query with score: {score}.")
+        return entry["response"]
+
+    def _search(self, embedding: List[float]) -> Optional[Any]:
+        """Run the vector search for the closest cached query."""
         logger.info("Saerching semantic cache.")
 
         # Define the post-filter pipeline if score_threshold is set
@@ -67,13 +189,13 @@ class MongoDBSemanticCache:
         )
 
         # Perform the similarity search
-        search_response = self.vector_store.similarity_search_with_score(
-            query=user_query,
+        search_response = self.vector_store._similarity_search_with_score(
+            embedding,
             k=1,
             post_filter_pipeline=post_filter_pipeline,
         )
         logger.info(f"Search response: {len(search_response)}")
-        
+
         # Process and return the result
         if search_response:
             logger.info(f"Semnatic cache hit for query with score: {search_response[0][1]}.")
@@ -84,4 +206,51 @@ class MongoDBSemanticCache:
 
     def update(self, user_query: str, llm_string: str, response: Any) -> None:
         """Update the cache with a new user_query and return value."""
-        self._insert_document(user_query, llm_string, response)
+        self._insert_document(user_query, llm_string, response, self._embed_text(user_query))
+
+    def update_by_vector(
+        self, user_query: str, llm_string: str, response: Any, embedding: List[float]
+    ) -> None:
+        """Update the cache using a precomputed embedding of user_query."""
+        self._insert_document(user_query, llm_string, response, embedding)
+
+    def update_many_by_vector(self, entries: List[tuple]) -> None:
+        """Insert several cache entries with a single `insert_many` round trip.
+
+        Args:
+            entries (List[tuple]): (user_query, llm_string, response, embedding) tuples.
+        """
+        if not entries:
+            return
+        self.vector_store._collection.insert_many(
+            [self._to_document(*entry) for entry in entries], ordered=False
+        )
+        self._has_documents = True
+        for user_query, llm_string, response, _ in entries:
+            self.l1.put(user_query, llm_string, response)
+        if self.local_index is not None:
+            self.local_index.add_many(entries)
+
+    async def alookup(self, user_query: str, llm_string: str) -> Optional[Any]:
+        """Async variant of `lookup` that runs off the event loop."""
+        return await run_blocking(self.lookup, user_query, llm_string)
+
+    async def alookup_by_vector(
+        self, user_query: str, llm_string: str, embedding: List[float]
+    ) -> Optional[Any]:
+        """Async variant of `lookup_by_vector` that runs off the event loop."""
+        return await run_blocking(self.lookup_by_vector, user_query, llm_string, embedding)
+
+    async def aupdate(self, user_query: str, llm_string: str, response: Any) -> None:
+        """Async variant of `update` that runs off the event loop."""
+        await run_blocking(self.update, user_query, llm_string, response)
+
+    async def aupdate_by_vector(
+        self, user_query: str, llm_string: str, response: Any, embedding: List[float]
+    ) -> None:
+        """Async variant of `update_by_vector` that runs off the event loop."""
+        await run_blocking(self.update_by_vector, user_query, llm_string, response, embedding)
+
+    async def aupdate_many_by_vector(self, entries: List[tuple]) -> None:
+        """Async variant of `update_many_by_vector` that runs off the event loop."""
+        await run_blocking(self.update_many_by_vector, entries)
@@ -0,0 +1,93 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_sql(sql: str) -> str:
+    """Normalize SQL text for cache keys: collapse whitespace and drop a trailing semicolon.
+
+    Case is preserved because string literals such as 'Pool' are case sensitive.
+    """
+    return " ".join(sql.split()).rstrip(";").rstrip()
+
+
+class InventoryResultCache:
+    """LRU cache of rendered inventory query results.
+
+    Entries are keyed on the normalized SQL text and the inventory table
+    version, so a reload of the sheet makes every earlier entry unreachable;
+    they are dropped as soon as a lookup sees the new version. Lookups and
+    stores made with an older version than the newest one seen are ignored.
+    Each entry records how many rows the query returned and how long it took
+    to run.
+    """
+
+    def __init__(self, max_entries: int = int(os.getenv("INVENTORY_RESULT_CACHE_SIZE", "512"))) -> None:
+        """
+        Initialize the result cache.
+
+        Args:
+            max_entries (int): Maximum number of results kept before evicting the least recently used.
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _sync_version(self, version: int) -> None:
+        """Drop every entry if the inventory version changed."""
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, sql: str, version: int) -> Optional[str]:
+        """Return the cached markdown for sql at the given inventory version, or None."""
+        key = normalize_sql(sql)
+        with self._lock:
+            if self._version is not None and version < self._version:
+                # Read the version before a reload; must not clear the newer entries
+                self.misses += 1
+                return None
+            self._sync_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry["hits"] += 1
+            self.hits += 1
+            return entry["markdown"]
+
+    def put(self, sql: str, version: int, markdown: str, rows_returned: int, elapsed_ms: float) -> None:
+        """Store a rendered result with its row count and execution time."""
+        key = normalize_sql(sql)
+        with self._lock:
+            if self._version is not None and version < self._version:
+                # Computed against a table that has since been reloaded
+                return
+            self._sync_version(version)
+            self._entries[key] = {
+                "markdown": markdown,
+                "rows_returned": rows_returned,
+                "elapsed_ms": elapsed_ms,
+                "hits": 0,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and per-entry returned row counts and timings."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "version": self._version,
+                "entries": [
+                    {"sql": sql, "rows_returned": entry["rows_returned"], "elapsed_ms": entry["elapsed_ms"], "hits": entry["hits"]}
+                    for sql, entry in self._entries.items()
+                ],
+            }
@@ -0,0 +1,81 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from logger import logger
+
+# Bounded pool for blocking pymongo, OpenAI and pandas calls made from async code.
+# Created on first use and again after shutdown_executor, so a later lifespan still works.
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("BLOCKING_POOL_SIZE", "16")),
+                thread_name_prefix="blocking-io",
+            )
+        return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking callable on the shared thread pool without stalling the event loop.
+
+    Args:
+        func: The blocking function to call.
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        Any: Whatever func returns.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_blocking_with_retry(
+    func: Callable[[], Any],
+    name: str,
+    retry_delay: float = float(os.getenv("BACKGROUND_RETRY_SECONDS", "30")),
+    max_delay: float = 600.0,
+) -> Any:
+    """Run a blocking background job until it succeeds, logging every failure.
+
+    Meant for startup work launched with `asyncio.create_task`, whose
+    exceptions would otherwise be dropped. Retries back off exponentially up
+    to `max_delay` seconds; cancelling the task stops the retries.
+
+    Args:
+        func: The blocking function to call.
+        name: Name of the job used in log messages.
+        retry_delay: Seconds to wait before the first retry.
+        max_delay: Upper bound on the wait between retries.
+
+    Returns:
+        Any: Whatever func returns once it succeeds.
+    """
+    delay = retry_delay
+    while True:
+        try:
+            return await run_blocking(func)
+        except Exception as e:
+            logger.error(f"{name} failed: {e}. Retrying in {delay:.0f}s.")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+
+def shutdown_executor() -> None:
+    """Wait for in-flight blocking calls and release the pool threads.
+
+    The next `run_blocking` call creates a fresh pool.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
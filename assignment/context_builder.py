@@ -0,0 +1,150 @@
+import hashlib
+import os
+import re
+from functools import lru_cache
+from typing import Optional
+import tiktoken
+from langchain.schema import Document as LCDocument
+from vector_store.atlas_vector import RETRIEVAL_K
+from logger import logger
+
+# Word n-gram size used to detect near-duplicate chunks without offsets
+SHINGLE_SIZE = 5
+# Room for all RETRIEVAL_K chunks at the ingestion chunk size; overlap between them is cut before packing
+CONTEXT_TOKEN_BUDGET = int(
+    os.getenv("CONTEXT_TOKEN_BUDGET") or RETRIEVAL_K * int(os.getenv("INGESTION_CHUNK_SIZE_TOKENS", "1000"))
+)
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def _shingles(text: str) -> set[int]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {hash(" ".join(words))} if words else set()
+    return {hash(" ".join(words[i:i + SHINGLE_SIZE])) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+class ContextBuilder:
+    """Assemble the retrieval context passed to `generate_response`.
+
+    Retrieved chunks are taken in order of similarity score. Exact duplicates
+    are dropped. For chunks carrying `source`/`start_index`/`end_index`
+    metadata (recursive chunks), the span already covered by a better-ranked
+    chunk of the same source is cut away, which removes the splitter overlap.
+    Other chunks are dropped when most of their word 5-grams were already
+    included. The remaining chunks are packed greedily into `token_budget`
+    tokens of the generation model. The default budget fits every retrieved
+    chunk; a smaller CONTEXT_TOKEN_BUDGET trades the lowest-ranked chunks for
+    fewer prompt tokens, and each full chunk it leaves out is about
+    INGESTION_CHUNK_SIZE_TOKENS tokens.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        max_duplicate_share: float = float(os.getenv("CONTEXT_MAX_DUPLICATE_SHARE", "0.8")),
+        model: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+    ) -> None:
+        """
+        Initialize the builder.
+
+        Args:
+            token_budget (int): Maximum number of context tokens sent to the model.
+            max_duplicate_share (float): Chunks whose shingles are already included beyond this share are dropped.
+            model (str): Model whose tokenizer measures the budget.
+        """
+        self.token_budget = token_budget
+        self.max_duplicate_share = max_duplicate_share
+        self.model = model
+
+    def _count_tokens(self, text: str) -> int:
+        return len(_encoding(self.model).encode(text, disallowed_special=()))
+
+    def _truncate(self, text: str, tokens: int) -> str:
+        encoding = _encoding(self.model)
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:tokens])
+
+    @staticmethod
+    def _uncovered(text: str, start: int, end: int, covered: list[tuple[int, int]]) -> Optional[str]:
+        """Return the part of text[start:end] not covered by earlier spans, or None if nothing is left."""
+        pieces = [(start, end)]
+        for covered_start, covered_end in covered:
+            remaining = []
+            for piece_start, piece_end in pieces:
+                if covered_end <= piece_start or covered_start >= piece_end:
+                    remaining.append((piece_start, piece_end))
+                    continue
+                if piece_start < covered_start:
+                    remaining.append((piece_start, covered_start))
+                if covered_end < piece_end:
+                    remaining.append((covered_end, piece_end))
+            pieces = remaining
+        parts = [text[piece_start - start:piece_end - start].strip() for piece_start, piece_end in pieces]
+        parts = [part for part in parts if part]
+        return " ... ".join(parts) if parts else None
+
+    def build(self, docs_and_scores: list[tuple[LCDocument, float]]) -> str:
+        """Deduplicate, rank and pack retrieved chunks into the context text.
+
+        Args:
+            docs_and_scores (list[tuple[LCDocument, float]]): Retrieved documents with their scores.
+
+        Returns:
+            str: The context, chunks separated by blank lines, best match first.
+        """
+        seen_hashes = set()
+        seen_shingles: set[int] = set()
+        covered: dict[str, list[tuple[int, int]]] = {}
+        selected = []
+        used_tokens = 0
+        dropped = 0
+        for doc, _ in sorted(docs_and_scores, key=lambda pair: pair[1], reverse=True):
+            text = doc.page_content.strip()
+            digest = hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+            if not text or digest in seen_hashes:
+                dropped += 1
+                continue
+            seen_hashes.add(digest)
+
+            metadata = doc.metadata
+            source, start, end = metadata.get("source"), metadata.get("start_index"), metadata.get("end_index")
+            if source is not None and start is not None and end == start + len(doc.page_content):
+                spans = covered.setdefault(source, [])
+                uncovered = self._uncovered(doc.page_content, start, end, spans)
+                spans.append((start, end))
+                if uncovered is None:
+                    dropped += 1
+                    continue
+                text = uncovered
+            shingles = _shingles(text)
+            if shingles and len(shingles & seen_shingles) / len(shingles) > self.max_duplicate_share:
+                dropped += 1
+                continue
+            seen_shingles |= shingles
+
+            remaining = self.token_budget - used_tokens
+            tokens = self._count_tokens(text)
+            if tokens > remaining:
+                # Always send something: the best match is cut to the budget, later ones are skipped
+                if selected:
+                    dropped += 1
+                    continue
+                text, tokens = self._truncate(text, remaining), remaining
+            selected.append(text)
+            used_tokens += tokens
+
+        logger.info(
+            f"Context built from {len(selected)} of {len(docs_and_scores)} chunks "
+            f"({used_tokens} tokens, {dropped} dropped)."
+        )
+        return "\n\n".join(selected)
+
+
+context_builder = ContextBuilder()
@@ -1,25 +1,41 @@
-import pandas as pd
-import pandasql as psql
+import time
+from inventory_engine import inventory_engine
+from cache.query_result_cache import InventoryResultCache
 from logger import logger
+from concurrency import run_blocking
+
+# Rendered results of repeated inventory queries, invalidated on sheet reload
+inventory_result_cache = InventoryResultCache()
 
 def execute_query_on_csv(query):
     """
-    Reads an Excel file, executes the given SQL query on it, and returns the results as a Markdown table.
+    Executes the given SQL query on the in-memory inventory table and returns the results as a Markdown table.
     """
 
     logger.info(f"Executing query: {query}")
-    # Load the Excel file into a pandas DataFrame
-    df = pd.read_excel(r"Dataset/Inventory sheet.xlsx")
-    
-    # Create a local variable dictionary to pass to pandasql
-    local_vars = {'df': df}
-    
-    # Execute the SQL query using pandasql, passing in the DataFrame explicitly
-    result_df = psql.sqldf(query, local_vars)
+    inventory_engine.load()
+    version = inventory_engine.version
+    cached_markdown = inventory_result_cache.get(query, version)
+    if cached_markdown is not None:
+        logger.info("Inventory result cache hit.")
+        return cached_markdown
+
+    # Run the SQL against the inventory loaded once by the engine
+    start = time.perf_counter()
+    result_df = inventory_engine.query(query)
     
     # Convert the result to a Markdown table format
     result_markdown = result_df.to_markdown(index=False)
+    elapsed_ms = (time.perf_counter() - start) * 1000
 
+    inventory_result_cache.put(query, version, result_markdown, rows_returned=len(result_df), elapsed_ms=elapsed_ms)
     logger.info("Query execution completed successfully.")
     
     return result_markdown
+
+
+async def aexecute_query_on_csv(query):
+    """
+    Async variant of `execute_query_on_csv` that runs the SQL off the event loop.
+    """
+    return await run_blocking(execute_query_on_csv, query)
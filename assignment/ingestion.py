@@ -1,13 +1,21 @@
-from PyPDF2 import PdfReader
-from agents.metadata import create_metadata
-from utils import process_document_text
+from pdf_extraction import iter_page_texts
 from vector_store.atlas_vector import AtlasVectorStore
+from vector_store.embedding import EMBEDDING_MODEL
+from ingestion_pipeline import IngestionPipeline
+from ingestion_manifest import create_manifest, file_sha256, chunk_sha256
+import argparse
 import asyncio
+import os
 from logger import logger
 import re
 from text_splitter import RecursiveCharacterTextSplitter
 
 avs = AtlasVectorStore()
+manifest = create_manifest(avs.backend)
+
+# Chunks are sized in tokens of the embedding model rather than in characters
+CHUNK_SIZE_TOKENS = int(os.getenv("INGESTION_CHUNK_SIZE_TOKENS", "1000"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("INGESTION_CHUNK_OVERLAP_TOKENS", "200"))
 
 from docx import Document
 
@@ -24,82 +32,68 @@ def extract_text_from_docx(docx_path):
     return '\n'.join(full_text)
 
 
+def iter_docx_paragraphs(docx_path):
+    """Yield (text, metadata) blocks for each paragraph of the DOCX file."""
+    doc = Document(docx_path)
+    for i, para in enumerate(doc.paragraphs):
+        yield para.text, {"paragraph": i + 1}
 
-async def extract_pdf_text_with_metadata(pdf_path):
-    logger.info(f"Processing PDF: {pdf_path}")
-    
-    # Load the PDF file
-    pdf_reader = PdfReader(pdf_path)
-    
-    # Loop through each page, extract text, and create metadata
-    for i in range(len(pdf_reader.pages)):
-        page = pdf_reader.pages[i]
-        page_text = page.extract_text()
-        
-        if page_text is None or page_text.strip() == "":
-            logger.info(f"Page {i+1} is empty.")
+
+
+def iter_pdf_pages(pdf_path, workers=None):
+    """Yield one pipeline item per non-empty page of the PDF."""
+    # Pages are extracted in a process pool and arrive in page order
+    for page_number, page_text in iter_page_texts(pdf_path, workers=workers):
+        if page_text.strip() == "":
+            logger.info(f"Page {page_number} is empty.")
             continue
         
         # Ensure Unicode errors are handled when printing
         safe_text = page_text.encode('ascii', 'ignore').decode('ascii')
-        logger.info(f"Extracted text from page {i+1}: {safe_text}")
-        
-        # Generate metadata for the extracted text
-        metadata = await create_metadata(page_text)
-        logger.info(f"Metadata for page {i+1}: {metadata}")
-        
-        # Store the text and metadata
-        pdf_data = {
-            "text": page_text,
-            "metadata": metadata
-        }
-    
-        logger.info("Processing completed.")
-        
-        # Process and add documents to vector store
-        documents = await process_document_text(pdf_data)
-        logger.info(f"Adding {len(documents)} documents to the vector store.")
-        avs.add_documents(docs=documents)
-        logger.info("Documents added.")
+        logger.info(f"Extracted text from page {page_number}: {safe_text}")
+        yield {"text": page_text}
+
+
+async def extract_pdf_text_with_metadata(pdf_path, workers=None):
+    logger.info(f"Processing PDF: {pdf_path}")
+    # Extraction, metadata, embedding and writes overlap in the pipeline
+    await IngestionPipeline(vector_store=avs, manifest=manifest).run(
+        iter_pdf_pages(pdf_path, workers=workers), source=pdf_path, file_hash=file_sha256(pdf_path)
+    )
+    logger.info("Processing completed.")
 
 
-def read_pdf(file_path):
+def read_pdf(file_path, workers=None):
     """Read text from a PDF file."""
-    with open(file_path, 'rb') as file:
-        reader = PdfReader(file)
-        text = ''
-        for page_num in range(len(reader.pages)):
-            page_text = reader.pages[page_num].extract_text()
-            text += page_text
-    return text
-
-async def create_recursive_embeddings(file_path):
-    pdf_text = read_pdf(file_path)
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
+    return ''.join(page_text for _, page_text in iter_page_texts(file_path, workers=workers))
+
+def iter_chunk_items(blocks, block_separator=""):
+    """Stream pipeline items for the chunks of a stream of (text, metadata) blocks."""
+    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        model_name=EMBEDDING_MODEL,
+        chunk_size=CHUNK_SIZE_TOKENS,
+        chunk_overlap=CHUNK_OVERLAP_TOKENS,
     )
-    # Split the text
-    chunks = text_splitter.split_text(pdf_text)
-    # Dictionary to store text and metadata from each page
-    pdf_data = {}
-    for chunk in chunks:
-        metadata = await create_metadata(chunk)
-        logger.info(f"Metadata for chunk: {metadata}")
-
-        # Store the text and metadata
-        pdf_data = {
-            "text": chunk,
-            "metadata": metadata
-        }
-    
-        logger.info("Processing completed.")
-        
-        # Process and add documents to vector store
-        documents = await process_document_text(pdf_data)
-        logger.info(f"Adding {len(documents)} documents to the vector store.")
-        avs.add_documents(docs=documents)
-        logger.info("Documents added.")
+    # Chunks are produced as blocks arrive, so the whole text is never held in memory
+    for chunk, metadata in text_splitter.split_stream(blocks, block_separator=block_separator):
+        yield {"text": chunk, "metadata": metadata}
+
+async def create_recursive_embeddings(file_path, workers=None):
+    pages = ((page_text, {"page": page_number}) for page_number, page_text in iter_page_texts(file_path, workers=workers))
+    # Recursive chunks are tracked separately from the page-level ingestion of the same file
+    await IngestionPipeline(vector_store=avs, manifest=manifest).run(
+        iter_chunk_items(pages), source=f"{file_path}#chunks", file_hash=file_sha256(file_path)
+    )
+    logger.info("Processing completed.")
+
+async def create_docx_embeddings(docx_path):
+    # Paragraphs were joined with newlines by extract_text_from_docx; keep the same boundaries
+    await IngestionPipeline(vector_store=avs, manifest=manifest).run(
+        iter_chunk_items(iter_docx_paragraphs(docx_path), block_separator="\n"),
+        source=f"{docx_path}#chunks",
+        file_hash=file_sha256(docx_path),
+    )
+    logger.info("Processing completed.")
 
 async def manual_and_image_text():
     text = """
@@ -114,25 +108,20 @@ async def manual_and_image_text():
     50 qualified customer walk-ins in a month	Bonus of $10,000
 
     """
-    metadata = await create_metadata(text)
-    logger.info(f"Metadata for chunk: {metadata}")
-
-        # Store the text and metadata
-    pdf_data = {
-        "text": text,
-        "metadata": metadata
-    }
-    
-    logger.info("Processing completed.")
-        
-    # Process and add documents to vector store
-    documents = await process_document_text(pdf_data)
-    logger.info(f"Adding {len(documents)} documents to the vector store.")
-    avs.add_documents(docs=documents)
+    # Re-running replaces the previous version of this text instead of duplicating it
+    await IngestionPipeline(vector_store=avs, manifest=manifest).run(
+        [{"text": text}], source="manual_and_image_text", file_hash=chunk_sha256(text)
+    )
     logger.info("Documents added.")
 
 
 
 if __name__ == "__main__":
-    file_path = r"Dataset/facade-catalogue-and-specifications.pdf"
-    asyncio.run(extract_pdf_text_with_metadata(file_path))
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Ingest a PDF or DOCX file into the vector store.")
+    parser.add_argument("file_path", nargs="?", default=r"Dataset/facade-catalogue-and-specifications.pdf")
+    parser.add_argument("--workers", type=int, default=None, help="PDF extraction processes (default: CPU count)")
+    args = parser.parse_args()
+    if args.file_path.lower().endswith(".docx"):
+        asyncio.run(create_docx_embeddings(args.file_path))
+    else:
+        asyncio.run(extract_pdf_text_with_metadata(args.file_path, workers=args.workers))
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from vector_store.backend import VectorStoreBackend
+from logger import logger
+
+
+def file_sha256(path: str) -> str:
+    """Content hash of a source file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_sha256(text: str) -> str:
+    """Content hash of a page or chunk of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class IngestionManifest:
+    """Record of what has been ingested into the vector collection.
+
+    Stored in a `<MONGODB_COLLECTION>_manifest` collection next to the vector
+    collection. Each source file has one entry with its hash and whether its
+    last ingestion completed, and each committed chunk has an entry with its
+    content hash and the ids of the vector documents inserted for it. This
+    lets ingestion skip unchanged files and chunks, delete chunks that
+    disappeared from a file, and resume after a crash from the last chunk
+    that was written.
+    """
+
+    def __init__(self, collection: Collection = None) -> None:
+        if collection is None:
+            from vector_store.db import database
+
+            collection = database[os.getenv("MONGODB_COLLECTION") + "_manifest"]
+        self.collection = collection
+
+    @staticmethod
+    def _file_id(source: str) -> str:
+        return f"file:{source}"
+
+    @staticmethod
+    def _chunk_id(source: str, chunk_hash: str) -> str:
+        return f"chunk:{source}:{chunk_hash}"
+
+    def is_complete(self, source: str, file_hash: str) -> bool:
+        """Whether source was fully ingested with exactly this content."""
+        entry = self.collection.find_one({"_id": self._file_id(source)})
+        return bool(entry and entry.get("file_hash") == file_hash and entry.get("complete"))
+
+    def start(self, source: str, file_hash: str) -> None:
+        """Mark an ingestion of source as in progress."""
+        self.collection.update_one(
+            {"_id": self._file_id(source)},
+            {"$set": {"type": "file", "source": source, "file_hash": file_hash, "complete": False}},
+            upsert=True,
+        )
+
+    def committed_chunks(self, source: str) -> dict[str, list]:
+        """Return {chunk_hash: inserted ids} for every committed chunk of source."""
+        return {
+            entry["chunk_hash"]: entry["ids"]
+            for entry in self.collection.find({"type": "chunk", "source": source})
+        }
+
+    def commit_chunks(self, source: str, chunk_ids: dict[str, list]) -> None:
+        """Record the vector document ids written for each chunk hash."""
+        if not chunk_ids:
+            return
+        now = datetime.now(timezone.utc)
+        self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": self._chunk_id(source, chunk_hash)},
+                    {
+                        "$set": {"type": "chunk", "source": source, "chunk_hash": chunk_hash, "committed_at": now},
+                        "$addToSet": {"ids": {"$each": ids}},
+                    },
+                    upsert=True,
+                )
+                for chunk_hash, ids in chunk_ids.items()
+            ],
+            ordered=False,
+        )
+
+    def remove_chunks(self, source: str, chunk_hashes: list[str]) -> None:
+        """Forget chunks whose vector documents were deleted."""
+        if chunk_hashes:
+            self.collection.delete_many(
+                {"_id": {"$in": [self._chunk_id(source, chunk_hash) for chunk_hash in chunk_hashes]}}
+            )
+
+    def complete(self, source: str, file_hash: str) -> None:
+        """Mark source as fully ingested with this content."""
+        self.collection.update_one(
+            {"_id": self._file_id(source)},
+            {"$set": {"type": "file", "source": source, "file_hash": file_hash, "complete": True}},
+            upsert=True,
+        )
+        logger.info(f"Manifest marked {source} complete.")
+
+
+class LocalIngestionManifest(IngestionManifest):
+    """The same record as `IngestionManifest`, kept in a JSONL file for the local backend.
+
+    Every change appends the new state of the affected entries (or a
+    tombstone for removed ones) to the file, which is replayed when it is
+    opened; the file is rewritten with the live entries only once most of its
+    lines are stale. No MongoDB connection is needed.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open or create the manifest.
+
+        Args:
+            path (str): JSONL file holding the manifest entries.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        lines = 0
+        if os.path.exists(path):
+            with open(path) as file:
+                for line in file:
+                    if not line.endswith("\n"):
+                        break  # unfinished append
+                    lines += 1
+                    record = json.loads(line)
+                    if "_deleted" in record:
+                        for _id in record["_deleted"]:
+                            self._entries.pop(_id, None)
+                    else:
+                        self._entries[record["_id"]] = record
+        if lines != len(self._entries):
+            self._rewrite()
+
+    def _rewrite(self) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            file.writelines(json.dumps(entry) + "\n" for entry in self._entries.values())
+        os.replace(tmp_path, self.path)
+
+    def _write(self, records: list[dict]) -> None:
+        with open(self.path, "a") as file:
+            file.writelines(json.dumps(record) + "\n" for record in records)
+
+    def _set_file(self, source: str, file_hash: str, complete: bool) -> None:
+        entry = {"_id": self._file_id(source), "type": "file", "source": source, "file_hash": file_hash, "complete": complete}
+        with self._lock:
+            self._entries[entry["_id"]] = entry
+            self._write([entry])
+
+    def is_complete(self, source: str, file_hash: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(self._file_id(source))
+        return bool(entry and entry.get("file_hash") == file_hash and entry.get("complete"))
+
+    def start(self, source: str, file_hash: str) -> None:
+        self._set_file(source, file_hash, complete=False)
+
+    def committed_chunks(self, source: str) -> dict[str, list]:
+        with self._lock:
+            return {
+                entry["chunk_hash"]: list(entry["ids"])
+                for entry in self._entries.values()
+                if entry["type"] == "chunk" and entry["source"] == source
+            }
+
+    def commit_chunks(self, source: str, chunk_ids: dict[str, list]) -> None:
+        if not chunk_ids:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            records = []
+            for chunk_hash, ids in chunk_ids.items():
+                _id = self._chunk_id(source, chunk_hash)
+                committed = self._entries.get(_id, {}).get("ids", [])
+                entry = {
+                    "_id": _id,
+                    "type": "chunk",
+                    "source": source,
+                    "chunk_hash": chunk_hash,
+                    "committed_at": now,
+                    "ids": committed + [str(_id) for _id in ids if str(_id) not in committed],
+                }
+                self._entries[_id] = entry
+                records.append(entry)
+            self._write(records)
+
+    def remove_chunks(self, source: str, chunk_hashes: list[str]) -> None:
+        if not chunk_hashes:
+            return
+        with self._lock:
+            removed = [self._chunk_id(source, chunk_hash) for chunk_hash in chunk_hashes]
+            for _id in removed:
+                self._entries.pop(_id, None)
+            self._write([{"_deleted": removed}])
+
+    def complete(self, source: str, file_hash: str) -> None:
+        self._set_file(source, file_hash, complete=True)
+        logger.info(f"Manifest marked {source} complete.")
+
+
+def create_manifest(backend: VectorStoreBackend) -> IngestionManifest:
+    """Build the manifest that lives next to the given vector store backend."""
+    from vector_store.local_backend import LocalVectorBackend
+
+    if isinstance(backend, LocalVectorBackend):
+        return LocalIngestionManifest(os.path.join(backend.path, "manifest.jsonl"))
+    return IngestionManifest()
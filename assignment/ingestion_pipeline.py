@@ -0,0 +1,236 @@
+import asyncio
+import os
+import time
+from typing import Iterable, Optional
+from agents.metadata import create_metadata
+from utils import process_document_text
+from vector_store.atlas_vector import AtlasVectorStore
+from vector_store.buffered_writer import BufferedVectorWriter
+from ingestion_manifest import IngestionManifest, chunk_sha256
+from concurrency import run_blocking
+from logger import logger
+
+# Sentinel passed down a queue to tell one worker of the next stage to stop
+_DONE = object()
+
+
+class AsyncRateLimiter:
+    """Spread calls evenly so that at most `per_minute` start in any minute."""
+
+    def __init__(self, per_minute: Optional[float]) -> None:
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until the next call is allowed to start."""
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class IngestionPipeline:
+    """Staged ingestion: extraction -> metadata -> embedding -> write.
+
+    Stages are connected by bounded queues, so a slow stage applies
+    backpressure to the ones before it, and each stage runs its own number of
+    concurrent workers. LLM metadata and embedding calls go through per-stage
+    rate limiters, which makes a large catalogue limited by API throughput
+    instead of by the latency of each step run one after another. The write
+    stage goes through a BufferedVectorWriter, so documents reach the vector
+    collection in large `insert_many` batches.
+
+    Items fed to `run` are dicts with a "text" key and an optional "metadata"
+    dict that is merged under the LLM-generated metadata.
+
+    When a manifest is given and `run` is called with a source, only chunks
+    whose content hash is not yet committed for that source go through the
+    pipeline, chunks that disappeared from the source are deleted from the
+    vector collection, and a crashed run resumes after the last flushed chunk.
+    """
+
+    def __init__(
+        self,
+        vector_store: Optional[AtlasVectorStore] = None,
+        metadata_concurrency: int = int(os.getenv("INGESTION_METADATA_CONCURRENCY", "4")),
+        embedding_concurrency: int = int(os.getenv("INGESTION_EMBEDDING_CONCURRENCY", "2")),
+        write_concurrency: int = int(os.getenv("INGESTION_WRITE_CONCURRENCY", "1")),
+        embedding_batch_size: int = int(os.getenv("INGESTION_EMBEDDING_BATCH_SIZE", "64")),
+        writer: Optional[BufferedVectorWriter] = None,
+        manifest: Optional[IngestionManifest] = None,
+        queue_size: int = int(os.getenv("INGESTION_QUEUE_SIZE", "32")),
+        metadata_requests_per_minute: Optional[float] = float(os.getenv("INGESTION_METADATA_RPM", "0")) or None,
+        embedding_requests_per_minute: Optional[float] = float(os.getenv("INGESTION_EMBEDDING_RPM", "0")) or None,
+    ) -> None:
+        """
+        Initialize the pipeline.
+
+        Args:
+            vector_store (AtlasVectorStore): (Optional) store documents are written to.
+            metadata_concurrency (int): Concurrent LLM metadata calls.
+            embedding_concurrency (int): Concurrent embedding requests.
+            write_concurrency (int): Concurrent vector store writes.
+            embedding_batch_size (int): Maximum chunks embedded per request.
+            writer (BufferedVectorWriter): (Optional) buffered writer used by the write stage.
+            manifest (IngestionManifest): (Optional) manifest used for incremental, resumable runs.
+            queue_size (int): Capacity of each queue between stages.
+            metadata_requests_per_minute (float): (Optional) rate limit for metadata calls.
+            embedding_requests_per_minute (float): (Optional) rate limit for embedding requests.
+        """
+        self.vector_store = vector_store or AtlasVectorStore()
+        self.metadata_concurrency = metadata_concurrency
+        self.embedding_concurrency = embedding_concurrency
+        self.write_concurrency = write_concurrency
+        self.embedding_batch_size = embedding_batch_size
+        self.writer = writer or BufferedVectorWriter(vector_store=self.vector_store)
+        self.writer.on_flush = self._on_flush
+        self.manifest = manifest
+        self._source = None
+        self.queue_size = queue_size
+        self.metadata_limiter = AsyncRateLimiter(metadata_requests_per_minute)
+        self.embedding_limiter = AsyncRateLimiter(embedding_requests_per_minute)
+        self.written = 0
+
+    async def run(
+        self, items: Iterable[dict], source: Optional[str] = None, file_hash: Optional[str] = None
+    ) -> int:
+        """Run every item through the pipeline.
+
+        Args:
+            items (Iterable[dict]): Extracted text items; iterated off the event loop.
+            source (str): (Optional) identifier of the source, used with the manifest.
+            file_hash (str): (Optional) content hash of the source file.
+
+        Returns:
+            int: Number of documents written to the vector store.
+        """
+        self.written = 0
+        self._source = source if self.manifest is not None else None
+        committed: dict[str, list] = {}
+        seen: set[str] = set()
+        if self._source is not None:
+            if file_hash and await run_blocking(self.manifest.is_complete, source, file_hash):
+                logger.info(f"{source} is unchanged since the last ingestion; skipping.")
+                return 0
+            await run_blocking(self.manifest.start, source, file_hash)
+            committed = await run_blocking(self.manifest.committed_chunks, source)
+            items = self._new_chunks(items, committed, seen)
+
+        metadata_queue = asyncio.Queue(self.queue_size)
+        embedding_queue = asyncio.Queue(self.queue_size)
+        write_queue = asyncio.Queue(self.queue_size)
+
+        async def stage(workers, downstream: asyncio.Queue, downstream_workers: int) -> None:
+            await asyncio.gather(*workers)
+            for _ in range(downstream_workers):
+                await downstream.put(_DONE)
+
+        tasks = [
+            asyncio.create_task(stage(
+                [self._extract(items, metadata_queue)], metadata_queue, self.metadata_concurrency
+            )),
+            asyncio.create_task(stage(
+                [self._metadata_worker(metadata_queue, embedding_queue) for _ in range(self.metadata_concurrency)],
+                embedding_queue, self.embedding_concurrency,
+            )),
+            asyncio.create_task(stage(
+                [self._embedding_worker(embedding_queue, write_queue) for _ in range(self.embedding_concurrency)],
+                write_queue, self.write_concurrency,
+            )),
+            asyncio.create_task(stage(
+                [self._write_worker(write_queue) for _ in range(self.write_concurrency)], asyncio.Queue(), 0
+            )),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            # Whatever reached the writer is persisted, on success and on error
+            self.written += len(await self.writer.aflush())
+
+        if self._source is not None:
+            stale = [chunk_hash for chunk_hash in committed if chunk_hash not in seen]
+            if stale:
+                ids = [id_ for chunk_hash in stale for id_ in committed[chunk_hash]]
+                deleted = await run_blocking(self.vector_store.delete_documents, ids)
+                await run_blocking(self.manifest.remove_chunks, source, stale)
+                logger.info(f"Deleted {deleted} stale documents for {source}.")
+            await run_blocking(self.manifest.complete, source, file_hash)
+            self._source = None
+        logger.info(f"Ingestion pipeline wrote {self.written} documents.")
+        return self.written
+
+    def _new_chunks(self, items: Iterable[dict], committed: dict, seen: set) -> Iterable[dict]:
+        """Tag items with their content hash and drop ones already committed or repeated."""
+        for item in items:
+            chunk_hash = chunk_sha256(item["text"])
+            if chunk_hash in seen:
+                continue
+            seen.add(chunk_hash)
+            if chunk_hash in committed:
+                continue
+            yield {
+                **item,
+                "metadata": {**item.get("metadata", {}), "source": self._source, "chunk_hash": chunk_hash},
+            }
+
+    def _on_flush(self, documents: list, ids: list) -> None:
+        """Commit flushed chunks to the manifest so a later run can skip or resume them."""
+        if self._source is None:
+            return
+        chunk_ids: dict[str, list] = {}
+        for document, id_ in zip(documents, ids):
+            chunk_hash = document.metadata.get("chunk_hash")
+            if chunk_hash is not None:
+                chunk_ids.setdefault(chunk_hash, []).append(id_)
+        self.manifest.commit_chunks(self._source, chunk_ids)
+
+    async def _extract(self, items: Iterable[dict], out: asyncio.Queue) -> None:
+        """Pull items from the (blocking) extractor on the thread pool and queue them."""
+        iterator = iter(items)
+        while True:
+            item = await run_blocking(next, iterator, _DONE)
+            if item is _DONE:
+                return
+            await out.put(item)
+
+    async def _metadata_worker(self, inbox: asyncio.Queue, out: asyncio.Queue) -> None:
+        while (item := await inbox.get()) is not _DONE:
+            await self.metadata_limiter.acquire()
+            metadata = await create_metadata(item["text"])
+            documents = await process_document_text(
+                {"text": item["text"], "metadata": {**item.get("metadata", {}), **metadata}}
+            )
+            for document in documents:
+                await out.put(document)
+
+    async def _embedding_worker(self, inbox: asyncio.Queue, out: asyncio.Queue) -> None:
+        done = False
+        while not done:
+            document = await inbox.get()
+            if document is _DONE:
+                return
+            batch = [document]
+            while len(batch) < self.embedding_batch_size and not inbox.empty():
+                document = inbox.get_nowait()
+                if document is _DONE:
+                    done = True
+                    break
+                batch.append(document)
+            await self.embedding_limiter.acquire()
+            embeddings = await self.vector_store.embedding.aembed_documents([d.page_content for d in batch])
+            await out.put((batch, embeddings))
+
+    async def _write_worker(self, inbox: asyncio.Queue) -> None:
+        while (item := await inbox.get()) is not _DONE:
+            documents, embeddings = item
+            self.written += len(await self.writer.aadd_documents(documents, embeddings))
@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import pandas as pd
+from logger import logger
+from concurrency import run_blocking
+
+INVENTORY_SHEET_PATH = os.getenv("INVENTORY_SHEET_PATH", r"Dataset/Inventory sheet.xlsx")
+
+# Seconds between checks of the inventory sheet for changes
+INVENTORY_WATCH_INTERVAL = float(os.getenv("INVENTORY_WATCH_INTERVAL", "30"))
+
+# Table name the generated SQL refers to (see agents/create_query.py)
+TABLE_NAME = "df"
+
+# SQLite column types for the inventory sheet
+COLUMN_TYPES = {
+    "Block": "INTEGER",
+    "Floor": "INTEGER",
+    "Stack/series": "INTEGER",
+    "Unit number": "INTEGER",
+    "Unit type": "TEXT",
+    "Area (sq ft.)": "INTEGER",
+    "View": "TEXT",
+    "Price": "INTEGER",
+    "Parking count": "INTEGER",
+    "Parking Slot size": "TEXT",
+    "Parking level": "TEXT",
+    "Sold?": "TEXT",
+}
+
+# Columns most inventory questions filter or sort on
+INDEXED_COLUMNS = ["Unit type", "Sold?", "Floor", "View", "Price"]
+
+# Authorizer actions a read-only query may perform; anything else is denied
+READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+# Leading comments and whitespace, then the first keyword of the statement
+LEADING_KEYWORD_PATTERN = re.compile(r"^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*(\w+)", re.S)
+
+
+def _read_only_authorizer(action: int, *args) -> int:
+    return sqlite3.SQLITE_OK if action in READ_ACTIONS else sqlite3.SQLITE_DENY
+
+
+def _check_select(sql: str) -> None:
+    """Reject anything but a single SELECT (or WITH ... SELECT) statement."""
+    match = LEADING_KEYWORD_PATTERN.match(sql)
+    if match is None or match.group(1).upper() not in ("SELECT", "WITH"):
+        raise ValueError(f"Only SELECT queries can run on the inventory table: {sql}")
+
+
+def _file_signature(path: str) -> tuple[int, int]:
+    """Cheap change check: modification time and size of the file."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _file_digest(path: str) -> str:
+    """Content hash of the file, used to ignore touches that change nothing."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _InventorySnapshot:
+    """One loaded version of the inventory table and the lock guarding its connection."""
+
+    def __init__(
+        self, connection: sqlite3.Connection, version: int, signature: tuple[int, int], digest: str
+    ) -> None:
+        self.connection = connection
+        self.lock = threading.Lock()
+        self.version = version
+        self.signature = signature
+        self.digest = digest
+        self.closed = False
+
+
+class InventoryEngine:
+    """Create a Singleton in-memory SQLite database holding the inventory sheet.
+
+    The sheet is parsed once and kept in a long-lived connection with typed
+    columns and indexes, so each inventory question only runs its SQL instead
+    of re-reading the Excel file and copying it into a fresh database.
+
+    When the sheet changes on disk a new table is built off to the side and
+    swapped in with a single reference assignment, so queries never wait on a
+    reload; queries already running finish against the previous table.
+
+    The table is read-only once built (`query_only` plus an authorizer that
+    only allows reads) and only SELECT statements are accepted, so SQL from
+    the LLM cannot change the data every later query sees.
+    """
+
+    _instance = None
+    _snapshot = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._reload_lock = threading.Lock()
+            cls._instance.path = INVENTORY_SHEET_PATH
+        return cls._instance
+
+    @staticmethod
+    def _build_connection(path: str) -> sqlite3.Connection:
+        """Load the sheet at path into a new indexed in-memory database."""
+        logger.info(f"Loading inventory sheet: {path}")
+        df = pd.read_excel(path)
+        # Trailing spaces in the sheet (e.g. "3 Bed ") would break equality filters
+        for column in df.select_dtypes(include="object").columns:
+            df[column] = df[column].map(lambda value: value.strip() if isinstance(value, str) else value)
+
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        df.to_sql(
+            TABLE_NAME,
+            connection,
+            index=False,
+            dtype={column: COLUMN_TYPES[column] for column in df.columns if column in COLUMN_TYPES},
+        )
+        for column in INDEXED_COLUMNS:
+            if column in df.columns:
+                index_name = "idx_" + "".join(c if c.isalnum() else "_" for c in column.lower())
+                connection.execute(f'CREATE INDEX "{index_name}" ON {TABLE_NAME} ("{column}")')
+        connection.execute("ANALYZE")
+        # Generated SQL runs on this shared connection; it must never change the table
+        connection.execute("PRAGMA query_only = ON")
+        connection.set_authorizer(_read_only_authorizer)
+        logger.info(f"Loaded {len(df)} inventory rows into memory.")
+        return connection
+
+    @property
+    def version(self) -> int:
+        """Version of the loaded table, incremented on every reload (0 if not loaded)."""
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else 0
+
+    def load(self) -> None:
+        """Load the inventory sheet if it has not been loaded yet."""
+        if self._snapshot is None:
+            self.reload()
+
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild the table if the sheet changed on disk, then swap it in atomically.
+
+        Args:
+            force (bool): Rebuild even if the file looks unchanged.
+
+        Returns:
+            bool: True if a new table was swapped in.
+        """
+        with self._reload_lock:
+            current = self._snapshot
+            signature = _file_signature(self.path)
+            if current is not None and not force and signature == current.signature:
+                return False
+            digest = _file_digest(self.path)
+            if current is not None and not force and digest == current.digest:
+                # Touched but identical content: remember the new mtime and keep the table
+                current.signature = signature
+                return False
+
+            snapshot = _InventorySnapshot(
+                self._build_connection(self.path),
+                version=(current.version if current is not None else 0) + 1,
+                signature=signature,
+                digest=digest,
+            )
+            self._snapshot = snapshot
+            logger.info(f"Inventory table swapped in at version {snapshot.version}.")
+
+        if current is not None:
+            # Waits only for queries still running on the old table
+            with current.lock:
+                current.connection.close()
+                current.closed = True
+        return True
+
+    async def watch(self, interval: float = INVENTORY_WATCH_INTERVAL) -> None:
+        """Poll the sheet for changes and reload it in the background until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_blocking(self.reload)
+            except Exception as e:
+                logger.error(f"Exception occured while reloading inventory sheet: {e}")
+
+    def query(self, sql: str) -> pd.DataFrame:
+        """Run a SQL query against the inventory table.
+
+        Args:
+            sql (str): SQL query referring to the inventory as `df`.
+
+        Returns:
+            pd.DataFrame: The query result.
+
+        Raises:
+            ValueError: If the statement is not a SELECT.
+        """
+        _check_select(sql)
+        self.load()
+        while True:
+            snapshot = self._snapshot
+            with snapshot.lock:
+                # A reload may have retired this table between the read and the lock
+                if not snapshot.closed:
+                    return pd.read_sql_query(sql, snapshot.connection)
+
+
+inventory_engine = InventoryEngine()
@@ -0,0 +1,57 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+from PyPDF2 import PdfReader
+
+# Pages extracted per worker task; each task opens the PDF once
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> list[str]:
+    """Extract the text of pages [start, stop) in a worker process."""
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def count_pages(pdf_path: str) -> int:
+    """Return the number of pages in the PDF."""
+    return len(PdfReader(pdf_path).pages)
+
+
+def iter_page_texts(pdf_path: str, workers: Optional[int] = None) -> Iterator[tuple[int, str]]:
+    """Yield (page number, text) for every page, in page order.
+
+    Page ranges are extracted in a process pool so the CPU-bound PyPDF2 work
+    neither holds the GIL of the caller nor blocks its event loop. At most
+    twice as many ranges as workers are in flight, so memory stays bounded
+    for very large PDFs.
+
+    Args:
+        pdf_path (str): Path of the PDF.
+        workers (int): (Optional) number of worker processes; defaults to the CPU count.
+            With 1 worker pages are extracted in the calling process.
+    """
+    workers = workers or os.cpu_count() or 1
+    page_count = count_pages(pdf_path)
+    ranges = [(start, min(start + PAGES_PER_TASK, page_count)) for start in range(0, page_count, PAGES_PER_TASK)]
+
+    if workers <= 1:
+        for start, stop in ranges:
+            for offset, text in enumerate(_extract_page_range(pdf_path, start, stop)):
+                yield start + offset + 1, text
+        return
+
+    # Forking a process that already runs threads (the blocking pool) can deadlock a child
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        next_range = 0
+        while pending or next_range < len(ranges):
+            while next_range < len(ranges) and len(pending) < 2 * workers:
+                start, stop = ranges[next_range]
+                pending.append((start, pool.submit(_extract_page_range, pdf_path, start, stop)))
+                next_range += 1
+            start, future = pending.popleft()
+            for offset, text in enumerate(future.result()):
+                yield start + offset + 1, text
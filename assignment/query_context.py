@@ -0,0 +1,33 @@
+from vector_store.embedding import OpenAIEmbeddingModel
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for exact-match keys: lowercase and collapse whitespace."""
+    return " ".join(str(query).lower().split())
+
+
+class QueryContext:
+    """Request-scoped state shared by every stage of a single /query call.
+
+    The query embedding is computed lazily on first access and then reused by
+    the semantic cache lookup, the vector search and the cache insert, so a
+    request never pays for more than one embedding round trip.
+    """
+
+    def __init__(self, query: str, embedding_model: OpenAIEmbeddingModel = None) -> None:
+        self.query = query
+        self._embedding_model = embedding_model or OpenAIEmbeddingModel()
+        self._embedding = None
+
+    @property
+    def embedding(self) -> list[float]:
+        """Embedding of the query, computed on first access."""
+        if self._embedding is None:
+            self._embedding = self._embedding_model.embed_query(self.query)
+        return self._embedding
+
+    async def aget_embedding(self) -> list[float]:
+        """Async variant of `embedding` that embeds off the event loop."""
+        if self._embedding is None:
+            self._embedding = await self._embedding_model.aembed_query(self.query)
+        return self._embedding
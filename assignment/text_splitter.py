@@ -1,5 +1,9 @@
 import re
-from typing import Any, Callable, Iterable
+import time
+from bisect import bisect_right
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Iterator
 
 
 class TextSplitter:
@@ -35,8 +39,53 @@ class TextSplitter:
         self._keep_separator = keep_separator
         self._add_start_index = add_start_index
         self._strip_whitespace = strip_whitespace
+        # Rough characters per length unit, used to size character buffers
+        self._chars_per_unit = 1
 
-    def _join_docs(self, docs: list[str], separator: str) -> str | None:
+    @classmethod
+    def from_tiktoken_encoder(
+        cls,
+        encoding_name: str = "cl100k_base",
+        model_name: str | None = None,
+        cache_size: int = 65536,
+        **kwargs: Any,
+    ) -> "TextSplitter":
+        """Create a splitter whose chunk_size and chunk_overlap are counted in tokens.
+
+        Token counts are memoized, so the substrings the recursive splitter
+        measures again at each separator level are only tokenized once.
+
+        Args:
+            encoding_name: tiktoken encoding to count with
+            model_name: (Optional) model whose encoding should be used instead
+            cache_size: Number of token counts kept in the LRU cache
+            **kwargs: Passed on to the splitter constructor
+
+        Returns:
+            A splitter measuring length in tokens.
+        """
+        try:
+            import tiktoken
+        except ImportError:
+            raise ImportError(
+                "Could not import tiktoken python package. "
+                "Please install it with `pip install tiktoken`."
+            )
+
+        if model_name is not None:
+            encoding = tiktoken.encoding_for_model(model_name)
+        else:
+            encoding = tiktoken.get_encoding(encoding_name)
+
+        @lru_cache(maxsize=cache_size)
+        def _tiktoken_encoder(text: str) -> int:
+            return len(encoding.encode(text, disallowed_special=()))
+
+        splitter = cls(length_function=_tiktoken_encoder, **kwargs)
+        splitter._chars_per_unit = 4
+        return splitter
+
+    def _join_docs(self, docs: Iterable[str], separator: str) -> str | None:
         """Join documents with a separator.
 
         Args:
@@ -54,23 +103,56 @@ class TextSplitter:
         else:
             return text
 
-    def _merge_splits(self, splits: Iterable[str], separator: str) -> list[str]:
+    def _merge_splits(
+        self, splits: Iterable[str], separator: str, lengths: Iterable[int] | None = None
+    ) -> list[str]:
         """Merge smaller splits into larger chunks.
 
         Args:
             splits: Iterable of smaller splits
             separator: Separator to use when joining splits
+            lengths: Lengths of the splits if the caller already measured them
 
         Returns:
             List of merged chunks.
         """
+        splits = list(splits)
+        return [doc for doc, _ in self._merge_located_splits(splits, [0] * len(splits), separator, lengths)]
+
+    def _merge_located_splits(
+        self,
+        splits: Iterable[str],
+        starts: Iterable[int],
+        separator: str,
+        lengths: Iterable[int] | None = None,
+    ) -> list[tuple[str, int]]:
+        """Merge smaller splits into larger chunks, carrying each chunk's start offset.
+
+        The current chunk is kept in deques of splits, their lengths and their
+        offsets, so dropping overlap from the front is O(1) and every split is
+        measured only once; merging is linear in the number of splits.
+
+        Args:
+            splits: Iterable of smaller splits
+            starts: Offset of each split in the text it was split from
+            separator: Separator to use when joining splits
+            lengths: Lengths of the splits if the caller already measured them
+
+        Returns:
+            List of (chunk, start offset) pairs.
+        """
         separator_len = self._length_function(separator)
+        if lengths is None:
+            # Splits may be a one-shot iterator; it is read again below
+            splits = list(splits)
+            lengths = map(self._length_function, splits)
 
         docs = []
-        current_doc: list[str] = []
+        current_doc: deque[str] = deque()
+        current_lengths: deque[int] = deque()
+        current_starts: deque[int] = deque()
         total = 0
-        for d in splits:
-            _len = self._length_function(d)
+        for d, start, _len in zip(splits, starts, lengths):
             if (
                 total + _len + (separator_len if len(current_doc) > 0 else 0)
                 > self._chunk_size
@@ -81,7 +163,7 @@ class TextSplitter:
                         f"which is longer than the specified {self._chunk_size}"
                     )
                 if len(current_doc) > 0:
-                    doc = self._join_docs(current_doc, separator)
+                    doc = self._join_docs_at(current_doc, current_starts[0], separator)
                     if doc is not None:
                         docs.append(doc)
                     # Keep on popping if:
@@ -92,21 +174,114 @@ class TextSplitter:
                         > self._chunk_size
                         and total > 0
                     ):
-                        total -= self._length_function(current_doc[0]) + (
+                        total -= current_lengths.popleft() + (
                             separator_len if len(current_doc) > 1 else 0
                         )
-                        current_doc = current_doc[1:]
+                        current_doc.popleft()
+                        current_starts.popleft()
             current_doc.append(d)
+            current_lengths.append(_len)
+            current_starts.append(start)
             total += _len + (separator_len if len(current_doc) > 1 else 0)
-        doc = self._join_docs(current_doc, separator)
-        if doc is not None:
-            docs.append(doc)
+        if current_doc:
+            doc = self._join_docs_at(current_doc, current_starts[0], separator)
+            if doc is not None:
+                docs.append(doc)
         return docs
 
+    def _join_docs_at(self, docs: Iterable[str], start: int, separator: str) -> tuple[str, int] | None:
+        """Join documents like `_join_docs` and shift start past any stripped leading whitespace."""
+        text = separator.join(docs)
+        if self._strip_whitespace:
+            stripped = text.lstrip()
+            start += len(text) - len(stripped)
+            text = stripped.rstrip()
+        if text == "":
+            return None
+        return text, start
+
     def split_text(self, text: str) -> list[str]:
         """Implement this function in the subclasses."""
         raise NotImplementedError("split_text method must be implemented in subclasses")
 
+    def split_text_with_offsets(self, text: str) -> list[tuple[str, int]]:
+        """Implement this function in the subclasses."""
+        raise NotImplementedError("split_text_with_offsets method must be implemented in subclasses")
+
+    def split_stream(
+        self,
+        blocks: Iterable[tuple[str, dict]],
+        block_separator: str = "",
+        window: int | None = None,
+    ) -> Iterator[tuple[str, dict]]:
+        """Split a stream of text blocks (pages, paragraphs) into chunks.
+
+        Blocks are appended to a bounded buffer that is split whenever it holds
+        at least `window` characters. Every chunk except the last is emitted and
+        the buffer restarts at the last chunk, so overlap is preserved across
+        block boundaries while memory stays proportional to `window` rather
+        than to the whole document.
+
+        Args:
+            blocks: Iterable of (text, metadata) pairs, e.g. ("...", {"page": 3})
+            block_separator: Text inserted between consecutive blocks
+            window: Buffer size in characters that triggers a split;
+                    defaults to about eight chunks
+
+        Yields:
+            (chunk, metadata) pairs. The metadata is that of the block the chunk
+            starts in, plus `start_index`/`end_index` offsets into the
+            concatenated stream and `end_<key>` for block metadata that differs
+            where the chunk ends (e.g. `end_page`).
+        """
+        window = window or 8 * self._chunk_size * self._chars_per_unit
+        buffer = ""
+        buffer_offset = 0
+        block_starts: list[int] = []
+        block_metadata: list[dict] = []
+
+        def metadata_at(offset: int) -> dict:
+            index = max(bisect_right(block_starts, offset) - 1, 0)
+            return block_metadata[index] if block_metadata else {}
+
+        def emit(final: bool) -> Iterator[tuple[str, dict]]:
+            nonlocal buffer, buffer_offset, block_starts, block_metadata
+            located = self.split_text_with_offsets(buffer)
+            if not final and len(located) < 2:
+                return
+            emitted = located if final else located[:-1]
+            for chunk, start in emitted:
+                start_index = buffer_offset + start
+                end_index = start_index + len(chunk)
+                metadata = dict(metadata_at(start_index))
+                end_metadata = metadata_at(max(end_index - 1, start_index))
+                for key, value in end_metadata.items():
+                    if metadata.get(key) != value:
+                        metadata[f"end_{key}"] = value
+                metadata["start_index"] = start_index
+                metadata["end_index"] = end_index
+                yield chunk, metadata
+            if final:
+                return
+            # Keep only the text from the last chunk onwards, and the blocks it touches
+            keep_from = located[-1][1]
+            buffer = buffer[keep_from:]
+            buffer_offset += keep_from
+            first_block = max(bisect_right(block_starts, buffer_offset) - 1, 0)
+            block_starts = block_starts[first_block:]
+            block_metadata = block_metadata[first_block:]
+
+        for text, metadata in blocks:
+            if block_starts and block_separator:
+                buffer += block_separator
+            block_starts.append(buffer_offset + len(buffer))
+            block_metadata.append(metadata or {})
+            buffer += text
+            if len(buffer) >= window:
+                yield from emit(final=False)
+        if buffer:
+            yield from emit(final=True)
+
 
 class RecursiveCharacterTextSplitter(TextSplitter):
     """Utility class for recursively splitting text into chunks based on seperators."""
@@ -121,6 +296,21 @@ class RecursiveCharacterTextSplitter(TextSplitter):
         super().__init__(keep_separator=keep_separator, **kwargs)
         self._separators = separators or ["\n\n", "\n", " ", ""]
         self._is_separator_regex = is_separator_regex
+        # Compiled separator patterns, built once per splitter instead of per call
+        self._patterns: dict[tuple[str, bool], re.Pattern] = {}
+        for _s in self._separators:
+            if _s:
+                self._pattern(_s if is_separator_regex else re.escape(_s))
+                self._pattern(_s if is_separator_regex else re.escape(_s), capture=True)
+
+    def _pattern(self, separator: str, capture: bool = False) -> re.Pattern:
+        """Return the compiled pattern for a separator, compiling it on first use."""
+        key = (separator, capture)
+        pattern = self._patterns.get(key)
+        if pattern is None:
+            pattern = re.compile(f"({separator})" if capture else separator)
+            self._patterns[key] = pattern
+        return pattern
 
     def split_text(self, text: str) -> list[str]:
         """Split text based on the separators and return a list of text chunks.
@@ -132,27 +322,49 @@ class RecursiveCharacterTextSplitter(TextSplitter):
             A list of strings, each string representing a chunk of the split text.
         """
         return self._split_text(text, self._separators)
-    
+
+    def split_text_with_offsets(self, text: str) -> list[tuple[str, int]]:
+        """Split text like `split_text`, returning each chunk with its start offset in text.
+
+        Offsets are carried through the recursive splitting and merging, so a
+        chunk whose text also occurs earlier (a repeated header or footer) still
+        gets its own position.
+
+        Args:
+            text: A string containing the text to be split.
+
+        Returns:
+            A list of (chunk, start offset) pairs.
+        """
+        return self._split_located_text(text, self._separators)
+
     def _split_text_with_regex(
     self, text: str, separator: str, keep_separator: bool
-    ) -> list[str]:
-        # Now that we have the separator, split the text
-        if separator:
-            if keep_separator:
-                # The parentheses in the pattern keep the delimiters in the result.
-                _splits = re.split(f"({separator})", text)
-                splits = [_splits[i] + _splits[i + 1] for i in range(1, len(_splits), 2)]  # noqa: E501
-                if len(_splits) % 2 == 0:
-                    splits += _splits[-1:]
-                splits = [_splits[0]] + splits
-            else:
-                splits = re.split(separator, text)
+    ) -> tuple[list[str], list[int]]:
+        """Split text on a separator pattern; returns the splits and their start offsets."""
+        if not separator:
+            return list(text), list(range(len(text)))
+        # The parentheses in the pattern keep the delimiters in the result:
+        # pieces of text alternate with separator matches.
+        _splits = self._pattern(separator, capture=True).split(text)
+        offsets, position = [], 0
+        for part in _splits:
+            offsets.append(position)
+            position += len(part)
+        if keep_separator:
+            splits = [_splits[0]] + [_splits[i] + _splits[i + 1] for i in range(1, len(_splits), 2)]
+            starts = [0] + offsets[1::2]
         else:
-            splits = list(text)
-        return [s for s in splits if s != ""]
+            splits, starts = _splits[::2], offsets[::2]
+        kept = [i for i, s in enumerate(splits) if s != ""]
+        return [splits[i] for i in kept], [starts[i] for i in kept]
 
     def _split_text(self, text: str, separators: list[str]) -> list[str]:
         """Split incoming text and return chunks."""
+        return [chunk for chunk, _ in self._split_located_text(text, separators)]
+
+    def _split_located_text(self, text: str, separators: list[str]) -> list[tuple[str, int]]:
+        """Split incoming text and return chunks with their start offsets."""
         final_chunks = []
         # Get appropriate separator to use
         separator = separators[-1]
@@ -162,32 +374,39 @@ class RecursiveCharacterTextSplitter(TextSplitter):
             if _s == "":
                 separator = _s
                 break
-            if re.search(_separator, text):
+            if self._pattern(_separator).search(text):
                 separator = _s
                 new_separators = separators[i + 1 :]
                 break
 
         _separator = separator if self._is_separator_regex else re.escape(separator)
-        splits = self._split_text_with_regex(text, _separator, self._keep_separator)
+        splits, starts = self._split_text_with_regex(text, _separator, self._keep_separator)
 
         # Now go merging things, recursively splitting longer texts.
         _good_splits = []
+        _good_starts = []
+        _good_lengths = []
         _separator = "" if self._keep_separator else separator
-        for s in splits:
-            if self._length_function(s) < self._chunk_size:
+        for s, start in zip(splits, starts):
+            _len = self._length_function(s)
+            if _len < self._chunk_size:
                 _good_splits.append(s)
+                _good_starts.append(start)
+                _good_lengths.append(_len)
             else:
                 if _good_splits:
-                    merged_text = self._merge_splits(_good_splits, _separator)
+                    merged_text = self._merge_located_splits(_good_splits, _good_starts, _separator, _good_lengths)
                     final_chunks.extend(merged_text)
                     _good_splits = []
+                    _good_starts = []
+                    _good_lengths = []
                 if not new_separators:
-                    final_chunks.append(s)
+                    final_chunks.append((s, start))
                 else:
-                    other_info = self._split_text(s, new_separators)
-                    final_chunks.extend(other_info)
+                    other_info = self._split_located_text(s, new_separators)
+                    final_chunks.extend((chunk, start + offset) for chunk, offset in other_info)
         if _good_splits:
-            merged_text = self._merge_splits(_good_splits, _separator)
+            merged_text = self._merge_located_splits(_good_splits, _good_starts, _separator, _good_lengths)
             final_chunks.extend(merged_text)
         return final_chunks
 
@@ -213,4 +432,25 @@ def example():
     for i, chunk in enumerate(chunks):
         print(f"Chunk {i + 1}:")
         print(chunk)
-        print("-" * 30)
\ No newline at end of file
+        print("-" * 30)
+
+
+def benchmark():
+    """Time split_text on inputs of growing size and print the cost per MB.
+
+    Roughly constant seconds per MB across sizes shows linear scaling. The
+    unbroken text exercises the single-character fallback separator, which
+    was the quadratic case before merging used deques.
+    """
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    words = "Dive into the joy of chunking where each piece is a puzzle of its own".split()
+    for label, unit in [("words", " ".join(words) + "\n"), ("unbroken", "".join(words))]:
+        for megabytes in (1, 2, 4):
+            text = unit * (megabytes * 1024 * 1024 // len(unit))
+            start = time.perf_counter()
+            chunks = splitter.split_text(text)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:>8} {megabytes} MB: {len(chunks)} chunks in {elapsed:.2f}s "
+                f"({elapsed / megabytes:.2f}s per MB)"
+            )
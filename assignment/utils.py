@@ -1,7 +1,7 @@
 from langchain.schema import Document as LangChainDocument
 from logger import logger
 from vector_store.db_cache import cache
-from fuzzywuzzy import fuzz
+from cache.fuzzy_index import fuzzy_query_index
 
 async def process_document_text( text_metadata: dict
 ) -> list[LangChainDocument]:
@@ -31,21 +31,19 @@ async def store_cache(query, response):
         {"query": query, "response": response}, 
         upsert=True
     )
+    # Keep the fuzzy index in sync with the collection
+    fuzzy_query_index.add(query)
 
 async def get_fuzzy_cached_response(query, threshold=85):
-    all_cached_data = cache.find()
-    best_match = None
-    best_score = 0
-
-    for data in all_cached_data:
-        cached_query = data["query"]
-        score = fuzz.ratio(query, cached_query)
-        logger.info(f"Score between {query} and {cached_query}: {score}")
-        if score > best_score and score >= threshold:
-            logger.info(f"Fuzzy match found with score: {score}")
-            best_score = score
-            best_match = data["response"]
-
-    if best_match:
+    # Candidates come from the in-memory n-gram index instead of scanning the whole collection
+    fuzzy_query_index.ensure_loaded(cache)
+    match = fuzzy_query_index.best_match(query, threshold)
+    if match is None:
+        return None
+
+    cached_query, best_score = match
+    cached_data = cache.find_one({"query": cached_query})
+    if cached_data:
         logger.info(f"Fuzzy match found with score: {best_score}")
-    return best_match
\ No newline at end of file
+        return cached_data["response"]
+    return None
@@ -1,30 +1,26 @@
 from langchain.schema import Document as LCDocument
-from langchain_community.vectorstores import MongoDBAtlasVectorSearch
-from pymongo.database import Database
-from vector_store.db import database
+from vector_store.backend import VectorStoreBackend, create_backend
 from vector_store.embedding import OpenAIEmbeddingModel
 import os
 from logger import logger
+from concurrency import run_blocking
+
+# Number of chunks retrieved per query
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "5"))
 
 
 class AtlasVectorStore:
-    vector_store: MongoDBAtlasVectorSearch
-    database: Database
+    backend: VectorStoreBackend
     embedding: OpenAIEmbeddingModel
     _instance = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(AtlasVectorStore, cls).__new__(cls)
-            cls._instance.database = database
             cls._instance.embedding = OpenAIEmbeddingModel()
-            cls._instance.vector_store = (
-                MongoDBAtlasVectorSearch.from_connection_string(
-                    connection_string=os.getenv("MONGODB_CONNECTION_URI"),
-                    namespace=os.getenv("MONGODB_DATABASE_NAME") + "." + os.getenv("MONGODB_COLLECTION"),
-                    embedding=cls._instance.embedding,
-                    index_name=os.getenv("MONGODB_INDEX_NAME"),
-                )
+            # "atlas" searches the Atlas collection, "local" an in-process store on disk
+            cls._instance.backend = create_backend(
+                os.getenv("VECTOR_STORE_BACKEND", "atlas"), cls._instance.embedding
             )
         return cls._instance
 
@@ -37,12 +33,36 @@ class AtlasVectorStore:
         Returns:
             List[str]: List of IDs of the added texts.
         """
-        return self.vector_store.add_documents(documents=docs, **kwargs)
+        embeddings = self.embedding.embed_documents([doc.page_content for doc in docs])
+        return self.add_embedded_documents(docs, embeddings)
+
+    def add_embedded_documents(self, docs: list[LCDocument], embeddings: list[list[float]]) -> list:
+        """Store documents whose embeddings were already computed, in one bulk insert.
+
+        Args:
+            docs (list[LCDocument]): Documents to add to the vectorstore.
+            embeddings (list[list[float]]): Embedding of each document's page_content.
+
+        Returns:
+            list: List of IDs of the inserted documents.
+        """
+        return self.backend.add_embedded_documents(docs, embeddings)
+
+    def delete_documents(self, ids: list) -> int:
+        """Delete documents from the vector collection by id.
+
+        Args:
+            ids (list): IDs returned when the documents were added.
+
+        Returns:
+            int: Number of deleted documents.
+        """
+        return self.backend.delete_documents(ids)
 
     def retrieve(
         self,
         query: str,
-        k: int = 5,
+        k: int = RETRIEVAL_K,
         pre_filter: dict = None,
         post_filter_pipeline: dict = None,
         with_score: bool = False,
@@ -51,7 +71,7 @@ class AtlasVectorStore:
 
         Args:
             query: Text to look up documents similar to.
-            k: (Optional) number of documents to return. Defaults to 4.
+            k: (Optional) number of documents to return. Defaults to RETRIEVAL_K.
             pre_filter: (Optional) dictionary of argument(s) to prefilter document
             fields on.
             post_filter_pipeline: (Optional) Pipeline of MongoDB aggregation stages
@@ -62,19 +82,54 @@ class AtlasVectorStore:
             list[LCDocument]:  List of documents most similar to the query and their scores.
         """
         logger.info(f"Retrieving documents for query: {query}")
-        if with_score:
-            return self.vector_store.similarity_search_with_score(
-                query=query,
-                k=k,
-                pre_filter=pre_filter,
-                post_filter_pipeline=post_filter_pipeline,
-            )
-        return self.vector_store.similarity_search(
-            query=query,
+        return self.retrieve_by_vector(
+            self.embedding.embed_query(query),
+            k=k,
+            pre_filter=pre_filter,
+            post_filter_pipeline=post_filter_pipeline,
+            with_score=with_score,
+        )
+
+    def retrieve_by_vector(
+        self,
+        embedding: list[float],
+        k: int = RETRIEVAL_K,
+        pre_filter: dict = None,
+        post_filter_pipeline: dict = None,
+        with_score: bool = False,
+    ) -> list[LCDocument]:
+        """Return MongoDB documents most similar to a precomputed query embedding.
+
+        Args:
+            embedding: Embedding of the query to look up documents similar to.
+            k: (Optional) number of documents to return. Defaults to RETRIEVAL_K.
+            pre_filter: (Optional) dictionary of argument(s) to prefilter document
+            fields on.
+            post_filter_pipeline: (Optional) Pipeline of MongoDB aggregation stages
+            following the vectorSearch stage.
+            with_score: (Optional) whether to return the scores along with the documents.
+
+        Returns:
+            list[LCDocument]:  List of documents most similar to the query and their scores.
+        """
+        logger.info("Retrieving documents for precomputed query embedding")
+        docs_and_scores = self.backend.search_by_vector(
+            embedding,
             k=k,
             pre_filter=pre_filter,
             post_filter_pipeline=post_filter_pipeline,
         )
+        if with_score:
+            return docs_and_scores
+        return [doc for doc, _ in docs_and_scores]
+
+    async def aretrieve(self, query: str, **kwargs) -> list[LCDocument]:
+        """Async variant of `retrieve` that runs off the event loop."""
+        return await run_blocking(self.retrieve, query, **kwargs)
+
+    async def aretrieve_by_vector(self, embedding: list[float], **kwargs) -> list[LCDocument]:
+        """Async variant of `retrieve_by_vector` that runs off the event loop."""
+        return await run_blocking(self.retrieve_by_vector, embedding, **kwargs)
 
 
-atlas_vector_store_obj = AtlasVectorStore()
\ No newline at end of file
+atlas_vector_store_obj = AtlasVectorStore()
@@ -0,0 +1,110 @@
+import os
+from abc import ABC, abstractmethod
+from langchain.schema import Document as LCDocument
+from langchain_community.vectorstores import MongoDBAtlasVectorSearch
+from vector_store.embedding import OpenAIEmbeddingModel
+
+
+class VectorStoreBackend(ABC):
+    """Storage and similarity search behind `AtlasVectorStore`.
+
+    Backends receive documents with precomputed embeddings and search by
+    embedding; embedding text is left to `AtlasVectorStore`. Scores follow
+    the Atlas cosine scale, (1 + cosine) / 2.
+    """
+
+    @abstractmethod
+    def add_embedded_documents(self, docs: list[LCDocument], embeddings: list[list[float]]) -> list:
+        """Store documents with their embeddings and return their ids."""
+
+    @abstractmethod
+    def delete_documents(self, ids: list) -> int:
+        """Delete documents by id and return how many were deleted."""
+
+    @abstractmethod
+    def search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 5,
+        pre_filter: dict = None,
+        post_filter_pipeline: list = None,
+    ) -> list[tuple[LCDocument, float]]:
+        """Return the k documents most similar to the embedding with their scores."""
+
+    @abstractmethod
+    def facet_counts(self, field: str) -> dict:
+        """Count documents per distinct string value of a metadata field; arrays count each element."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Return the number of stored documents."""
+
+
+class MongoDBAtlasBackend(VectorStoreBackend):
+    """Backend on an Atlas collection searched with `$vectorSearch`."""
+
+    def __init__(self, embedding: OpenAIEmbeddingModel) -> None:
+        self.vector_store = MongoDBAtlasVectorSearch.from_connection_string(
+            connection_string=os.getenv("MONGODB_CONNECTION_URI"),
+            namespace=os.getenv("MONGODB_DATABASE_NAME") + "." + os.getenv("MONGODB_COLLECTION"),
+            embedding=embedding,
+            index_name=os.getenv("MONGODB_INDEX_NAME"),
+        )
+
+    def add_embedded_documents(self, docs: list[LCDocument], embeddings: list[list[float]]) -> list:
+        if not docs:
+            return []
+        to_insert = [
+            {
+                self.vector_store._text_key: doc.page_content,
+                self.vector_store._embedding_key: embedding,
+                **doc.metadata,
+            }
+            for doc, embedding in zip(docs, embeddings)
+        ]
+        return self.vector_store._collection.insert_many(to_insert).inserted_ids
+
+    def delete_documents(self, ids: list) -> int:
+        if not ids:
+            return 0
+        return self.vector_store._collection.delete_many({"_id": {"$in": list(ids)}}).deleted_count
+
+    def search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 5,
+        pre_filter: dict = None,
+        post_filter_pipeline: list = None,
+    ) -> list[tuple[LCDocument, float]]:
+        return self.vector_store._similarity_search_with_score(
+            embedding,
+            k=k,
+            pre_filter=pre_filter,
+            post_filter_pipeline=post_filter_pipeline,
+        )
+
+    def facet_counts(self, field: str) -> dict:
+        pipeline = [
+            {"$project": {field: 1}},
+            {"$unwind": f"${field}"},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        ]
+        return {
+            group["_id"]: group["count"]
+            for group in self.vector_store._collection.aggregate(pipeline)
+            if isinstance(group["_id"], str)
+        }
+
+    def count(self) -> int:
+        return self.vector_store._collection.estimated_document_count()
+
+
+def create_backend(name: str, embedding: OpenAIEmbeddingModel) -> VectorStoreBackend:
+    """Build the backend selected by name ("atlas" or "local")."""
+    if name == "atlas":
+        return MongoDBAtlasBackend(embedding)
+    if name == "local":
+        from vector_store.local_backend import LocalVectorBackend
+
+        return LocalVectorBackend()
+    raise ValueError(f"Unknown vector store backend: {name}. Expected 'atlas' or 'local'.")
@@ -0,0 +1,116 @@
+import os
+import threading
+from typing import Callable, Optional
+from langchain.schema import Document as LangChainDocument
+from vector_store.atlas_vector import AtlasVectorStore
+from concurrency import run_blocking
+from logger import logger
+
+
+class BufferedVectorWriter:
+    """Ingestion-side writer that buffers documents and writes them in bulk.
+
+    Documents are collected until the buffer holds `max_documents` documents
+    or `max_bytes` of text, then flushed with one batched embedding call for
+    the documents that arrived without an embedding and a single
+    `insert_many`. Used as a (async) context manager it flushes whatever is
+    left on exit, including when the block raises.
+    """
+
+    def __init__(
+        self,
+        vector_store: Optional[AtlasVectorStore] = None,
+        max_documents: int = int(os.getenv("VECTOR_WRITER_MAX_DOCUMENTS", "256")),
+        max_bytes: int = int(os.getenv("VECTOR_WRITER_MAX_BYTES", str(4 * 1024 * 1024))),
+        on_flush: Optional[Callable[[list[LangChainDocument], list], None]] = None,
+    ) -> None:
+        """
+        Initialize the writer.
+
+        Args:
+            vector_store (AtlasVectorStore): (Optional) store the documents are written to.
+            max_documents (int): Flush once this many documents are buffered.
+            max_bytes (int): Flush once the buffered page content reaches this size.
+            on_flush (Callable): (Optional) called with the documents and their inserted ids after each flush.
+        """
+        self.vector_store = vector_store or AtlasVectorStore()
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self.on_flush = on_flush
+        self.inserted_ids: list = []
+        self._documents: list[LangChainDocument] = []
+        self._embeddings: list[Optional[list[float]]] = []
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def add_documents(
+        self, docs: list[LangChainDocument], embeddings: Optional[list[list[float]]] = None
+    ) -> list:
+        """Buffer documents, flushing when a size bound is reached.
+
+        Args:
+            docs (list[LangChainDocument]): Documents to write.
+            embeddings (list[list[float]]): (Optional) precomputed embedding per document.
+
+        Returns:
+            list: IDs inserted by flushes triggered by this call.
+        """
+        inserted = []
+        with self._lock:
+            for i, doc in enumerate(docs):
+                self._documents.append(doc)
+                self._embeddings.append(embeddings[i] if embeddings is not None else None)
+                self._bytes += len(doc.page_content.encode("utf-8"))
+                if len(self._documents) >= self.max_documents or self._bytes >= self.max_bytes:
+                    inserted.extend(self._flush())
+        return inserted
+
+    def flush(self) -> list:
+        """Write every buffered document now.
+
+        Returns:
+            list: IDs of the inserted documents.
+        """
+        with self._lock:
+            return self._flush()
+
+    def _flush(self) -> list:
+        documents, embeddings = self._documents, self._embeddings
+        if not documents:
+            return []
+        self._documents, self._embeddings, self._bytes = [], [], 0
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            created = self.vector_store.embedding.embed_documents([documents[i].page_content for i in missing])
+            for i, embedding in zip(missing, created):
+                embeddings[i] = embedding
+
+        ids = self.vector_store.add_embedded_documents(documents, embeddings)
+        self.inserted_ids.extend(ids)
+        if self.on_flush is not None:
+            self.on_flush(documents, ids)
+        logger.info(f"Flushed {len(documents)} documents to the vector store.")
+        return ids
+
+    async def aadd_documents(
+        self, docs: list[LangChainDocument], embeddings: Optional[list[list[float]]] = None
+    ) -> list:
+        """Async variant of `add_documents` that runs off the event loop."""
+        return await run_blocking(self.add_documents, docs, embeddings)
+
+    async def aflush(self) -> list:
+        """Async variant of `flush` that runs off the event loop."""
+        return await run_blocking(self.flush)
+
+    def __enter__(self) -> "BufferedVectorWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
+
+    async def __aenter__(self) -> "BufferedVectorWriter":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aflush()
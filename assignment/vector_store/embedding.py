@@ -1,6 +1,33 @@
 import openai
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from logger import logger
+from concurrency import run_blocking
+from vector_store.embedding_cache import EmbeddingCache
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# Request limits for the embeddings endpoint; batches are cut at whichever is hit first
+MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "512"))
+MAX_BATCH_TOKENS = int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", "250000"))
+MAX_CONCURRENT_REQUESTS = int(os.getenv("EMBEDDING_MAX_CONCURRENT_REQUESTS", "4"))
+MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+
+# Errors worth retrying with backoff; anything else is raised immediately
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used to size batches (about four characters per token)."""
+    return len(text) // 4 + 1
+
 
 class OpenAIEmbeddingModel:
     """An OpenAI Embedding Model class following the Singleton Design Pattern.
@@ -13,29 +40,83 @@ class OpenAIEmbeddingModel:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(OpenAIEmbeddingModel, cls).__new__(cls)
+            cls._instance.cache = EmbeddingCache()
             openai.api_key = os.getenv("OPENAI_API_KEY")  # Set your OpenAI API key here
         return cls._instance
 
+    @staticmethod
+    def _batches(texts: list[str]) -> list[list[str]]:
+        """Split texts into consecutive batches bounded by input count and estimated tokens."""
+        batches = []
+        batch, batch_tokens = [], 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if batch and (len(batch) >= MAX_BATCH_SIZE or batch_tokens + tokens > MAX_BATCH_TOKENS):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    @staticmethod
+    def _embed_batch(texts: list[str]) -> list[list[float]]:
+        """Embed one batch, retrying with exponential backoff on rate limits and transient errors."""
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = openai.embeddings.create(
+                    input=texts,
+                    model=EMBEDDING_MODEL  # Specify the OpenAI model for embeddings
+                )
+                # The API may return items out of order; `index` maps them back to the input
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except RETRYABLE_ERRORS as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = min(2 ** attempt, 60) + random.uniform(0, 1)
+                logger.warning(f"Embedding request failed ({e}); retrying in {delay:.1f}s.")
+                time.sleep(delay)
+
     def embed_documents(self, inputs: str | list[str]) -> list:
         """Create embeddings from the input using OpenAI's API.
 
+        Texts already in the embedding cache are served from it; the rest are
+        deduplicated and split into batches bounded by count and estimated
+        tokens, which are sent concurrently (at most MAX_CONCURRENT_REQUESTS at
+        a time) and then written back to the cache.
+
         Args:
             inputs (str | list[str]): The prompt(s) to encode. Can be a single prompt or a list of prompts.
 
         Returns:
-            list: a list of embeddings, where each embedding is a list of floats.
+            list: a list of embeddings, where each embedding is a list of floats, in input order.
         """
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        if not texts:
+            return []
+
+        embeddings = self.cache.get_many(EMBEDDING_MODEL, texts)
+        missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+        if not missing:
+            logger.info(f"Served {len(texts)} embeddings from cache")
+            return embeddings
 
-        response = openai.embeddings.create(
-            input=inputs,
-            model="text-embedding-ada-002"  # Specify the OpenAI model for embeddings
-        )
-         # If response is an object, use dot notation
-        embeddings = response.data[0].embedding
+        batches = self._batches(missing)
+        if len(batches) == 1:
+            results = [self._embed_batch(batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(batches))) as pool:
+                results = list(pool.map(self._embed_batch, batches))
+        created = [embedding for batch in results for embedding in batch]
+        self.cache.put_many(EMBEDDING_MODEL, missing, created)
 
-        logger.info("Embedding created successfully")
+        by_text = dict(zip(missing, created))
+        embeddings = [embedding if embedding is not None else by_text[text] for text, embedding in zip(texts, embeddings)]
 
-        return [embeddings]
+        logger.info(f"Created {len(created)} embeddings in {len(batches)} requests ({len(texts) - len(created)} cached)")
+
+        return embeddings
 
     def embed_query(self, input_query: str):
         """Embed a single query using the OpenAI embedding model.
@@ -49,5 +130,13 @@ class OpenAIEmbeddingModel:
         embedded_query = self.embed_documents(input_query)
         return embedded_query[0]
 
+    async def aembed_documents(self, inputs: str | list[str]) -> list:
+        """Async variant of `embed_documents` that runs off the event loop."""
+        return await run_blocking(self.embed_documents, inputs)
+
+    async def aembed_query(self, input_query: str):
+        """Async variant of `embed_query` that runs off the event loop."""
+        return await run_blocking(self.embed_query, input_query)
+
 # Run at application startup
 openai_model = OpenAIEmbeddingModel()
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Optional
+from logger import logger
+
+# Unset keeps only the in-memory tier
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "10000"))
+# About 600 MB of 1536-dimension float32 vectors
+EMBEDDING_CACHE_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "100000"))
+
+# SQLite limits the number of bound parameters per statement
+_SQLITE_BATCH = 500
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Content address of an embedding: hash of the model name and the exact text."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding store with an in-memory LRU tier over SQLite.
+
+    The on-disk tier is opt-in: when EMBEDDING_CACHE_PATH is set, vectors are
+    also stored there as float32 blobs keyed by hash(model, text), so
+    unchanged text is never sent to the embeddings API again, including after
+    a restart. It holds at most `max_rows` vectors; the oldest inserted are
+    evicted first. SQLite errors are logged and treated as cache misses, so a
+    broken cache file never fails an embedding call.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = EMBEDDING_CACHE_PATH,
+        max_memory_entries: int = EMBEDDING_CACHE_MEMORY_ENTRIES,
+        max_rows: int = EMBEDDING_CACHE_MAX_ROWS,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            path (str): (Optional) SQLite file for the on-disk tier.
+            max_memory_entries (int): Number of vectors kept in the in-memory LRU tier.
+            max_rows (int): Number of vectors kept in the on-disk tier.
+        """
+        self.max_memory_entries = max_memory_entries
+        self.max_rows = max_rows
+        self._memory: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._rows = 0
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._connection = sqlite3.connect(path, check_same_thread=False)
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+                )
+                self._connection.commit()
+                self._rows = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Embedding cache at {path} unavailable, keeping embeddings in memory only: {e}")
+                self._connection = None
+
+    def _remember(self, key: str, embedding: list[float]) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: list[str]) -> list[Optional[list[float]]]:
+        """Return the cached embedding for each text, or None where there is none."""
+        keys = [embedding_key(model, text) for text in texts]
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            missing = list({key for key in keys if key not in found})
+            if self._connection is not None:
+                try:
+                    for start in range(0, len(missing), _SQLITE_BATCH):
+                        chunk = missing[start:start + _SQLITE_BATCH]
+                        rows = self._connection.execute(
+                            f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                            chunk,
+                        ).fetchall()
+                        for key, blob in rows:
+                            embedding = array("f", blob).tolist()
+                            found[key] = embedding
+                            self._remember(key, embedding)
+                except sqlite3.Error as e:
+                    logger.error(f"Embedding cache read failed, treating the rest as misses: {e}")
+        return [found.get(key) for key in keys]
+
+    def put_many(self, model: str, texts: list[str], embeddings: list[list[float]]) -> None:
+        """Store embeddings for texts in both tiers."""
+        rows = []
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                key = embedding_key(model, text)
+                self._remember(key, embedding)
+                rows.append((key, array("f", embedding).tobytes()))
+            if self._connection is not None and rows:
+                try:
+                    # Keys are content addresses, so an existing row already holds the same vector
+                    self._rows += self._connection.executemany(
+                        "INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)", rows
+                    ).rowcount
+                    if self._rows > self.max_rows:
+                        self._rows -= self._connection.execute(
+                            "DELETE FROM embeddings WHERE rowid IN "
+                            "(SELECT rowid FROM embeddings ORDER BY rowid LIMIT ?)",
+                            (self._rows - self.max_rows,),
+                        ).rowcount
+                    self._connection.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Embedding cache write failed, vectors kept in memory only: {e}")
+                    self._connection.rollback()
@@ -0,0 +1,127 @@
+import os
+import re
+import threading
+from typing import Optional
+from pymongo.errors import OperationFailure
+from vector_store.atlas_vector import AtlasVectorStore
+from vector_store.backend import MongoDBAtlasBackend
+from logger import logger
+
+# Metadata fields written by agents/metadata.py that queries are matched against
+FACET_FIELDS = ("category", "keywords")
+
+
+class QueryFacetExtractor:
+    """Map a user query onto a `pre_filter` over the LLM-generated chunk metadata.
+
+    The vocabulary is the set of distinct `category` and `keywords` values in
+    the vector collection. A query that mentions one of them (as whole words,
+    case-insensitively) is restricted to the chunks carrying that value, so the
+    vector search ranks a smaller, more relevant candidate set. Values carried
+    by more than `max_share` of the documents would not narrow the search and
+    are left out. Extraction is a local regex match; no LLM is involved.
+    """
+
+    def __init__(
+        self,
+        vector_store: AtlasVectorStore = None,
+        fields: tuple = FACET_FIELDS,
+        max_share: float = float(os.getenv("FACET_MAX_SHARE", "0.5")),
+        min_length: int = 3,
+    ) -> None:
+        """
+        Initialize the extractor.
+
+        Args:
+            vector_store (AtlasVectorStore): (Optional) store whose metadata forms the vocabulary.
+            fields (tuple): Metadata fields to extract facets for.
+            max_share (float): Values on a larger share of the documents are ignored.
+            min_length (int): Values shorter than this are ignored.
+        """
+        self.vector_store = vector_store or AtlasVectorStore()
+        self.fields = fields
+        self.max_share = max_share
+        self.min_length = min_length
+        self._lock = threading.Lock()
+        self._patterns: dict[str, re.Pattern] = {}
+        self._values: dict[str, dict[str, list[str]]] = {}
+        self.filtered = 0
+        self.unfiltered = 0
+
+    def load(self) -> None:
+        """Read the distinct metadata values from the store and compile one pattern per field."""
+        backend = self.vector_store.backend
+        fields = self.fields
+        if isinstance(backend, MongoDBAtlasBackend):
+            from vector_store.indexes import declared_filter_fields
+
+            # Atlas rejects a pre_filter on any path the index does not declare as a filter
+            try:
+                declared = declared_filter_fields()
+            except OperationFailure as e:
+                logger.warning(f"Could not list vector search indexes: {e}")
+                declared = set()
+            missing = [field for field in fields if field not in declared]
+            if missing:
+                logger.warning(
+                    f"Vector index does not declare {missing} as filter fields; facets on them are "
+                    "disabled. Run `python -m vector_store.indexes` to update the index."
+                )
+            fields = tuple(field for field in fields if field in declared)
+        total = backend.count()
+        patterns, values = {}, {}
+        for field in fields:
+            terms: dict[str, list[str]] = {}
+            for value, count in backend.facet_counts(field).items():
+                term = " ".join(value.lower().split())
+                if len(term) < self.min_length or (total and count / total > self.max_share):
+                    continue
+                # Stored values that differ only in case or spacing all map to the same term
+                terms.setdefault(term, []).append(value)
+            if terms:
+                alternatives = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+                patterns[field] = re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)")
+                values[field] = terms
+        with self._lock:
+            self._patterns, self._values = patterns, values
+        logger.info(f"Facet vocabulary loaded: { {field: len(terms) for field, terms in values.items()} }")
+
+    def pre_filter(self, query: str) -> Optional[dict]:
+        """Build a `pre_filter` from the facets mentioned in the query.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            Optional[dict]: A filter matching chunks that carry any mentioned facet, or None.
+        """
+        text = " ".join(str(query).lower().split())
+        with self._lock:
+            patterns, values = self._patterns, self._values
+        conditions = []
+        for field, pattern in patterns.items():
+            matched = sorted({value for term in pattern.findall(text) for value in values[field][term]})
+            if matched:
+                conditions.append({field: {"$in": matched}})
+        with self._lock:
+            if conditions:
+                self.filtered += 1
+            else:
+                self.unfiltered += 1
+        if not conditions:
+            return None
+        pre_filter = conditions[0] if len(conditions) == 1 else {"$or": conditions}
+        logger.info(f"Query facets mapped to pre_filter: {pre_filter}")
+        return pre_filter
+
+    def stats(self) -> dict:
+        """Return vocabulary sizes and how many queries got a filter."""
+        with self._lock:
+            return {
+                "vocabulary": {field: len(terms) for field, terms in self._values.items()},
+                "filtered": self.filtered,
+                "unfiltered": self.unfiltered,
+            }
+
+
+query_facet_extractor = QueryFacetExtractor()
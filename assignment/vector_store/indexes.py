@@ -0,0 +1,79 @@
+import argparse
+import os
+from vector_store.db import database
+from logger import logger
+
+# Paths written by MongoDBAtlasBackend (langchain defaults) and by ingestion
+EMBEDDING_PATH = "embedding"
+EMBEDDING_DIMENSIONS = 1536  # text-embedding-ada-002
+# Metadata fields usable in `pre_filter`; Atlas rejects filters on fields not declared here
+FILTER_FIELDS = ["category", "keywords", "source"]
+
+
+def vector_index_definition(
+    num_dimensions: int = EMBEDDING_DIMENSIONS, similarity: str = "cosine"
+) -> dict:
+    """Atlas Vector Search index definition for the document collection.
+
+    Returns:
+        dict: The vector field plus one `filter` field per entry of FILTER_FIELDS.
+    """
+    return {
+        "fields": [
+            {
+                "type": "vector",
+                "path": EMBEDDING_PATH,
+                "numDimensions": num_dimensions,
+                "similarity": similarity,
+            },
+            *({"type": "filter", "path": field} for field in FILTER_FIELDS),
+        ]
+    }
+
+
+def declared_filter_fields(
+    collection_name: str = os.getenv("MONGODB_COLLECTION"),
+    index_name: str = os.getenv("MONGODB_INDEX_NAME"),
+) -> set[str]:
+    """Paths declared as `filter` fields in the live vector search index.
+
+    Returns:
+        set[str]: Filterable paths; empty when the index does not exist.
+    """
+    fields = set()
+    for index in database[collection_name].aggregate([{"$listSearchIndexes": {"name": index_name}}]):
+        definition = index.get("latestDefinition") or index.get("definition") or {}
+        fields.update(field["path"] for field in definition.get("fields", []) if field.get("type") == "filter")
+    return fields
+
+
+def ensure_vector_index(
+    collection_name: str = os.getenv("MONGODB_COLLECTION"),
+    index_name: str = os.getenv("MONGODB_INDEX_NAME"),
+) -> None:
+    """Create the vector search index, or update it to the current definition.
+
+    Uses the raw `createSearchIndexes` / `updateSearchIndex` commands, which the
+    pinned pymongo version does not wrap.
+    """
+    definition = vector_index_definition()
+    existing = list(database[collection_name].aggregate([{"$listSearchIndexes": {"name": index_name}}]))
+    if existing:
+        database.command({"updateSearchIndex": collection_name, "name": index_name, "definition": definition})
+        logger.info(f"Updated vector search index {index_name} on {collection_name}.")
+    else:
+        database.command(
+            {
+                "createSearchIndexes": collection_name,
+                "indexes": [{"name": index_name, "type": "vectorSearch", "definition": definition}],
+            }
+        )
+        logger.info(f"Created vector search index {index_name} on {collection_name}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or update the Atlas vector search index.")
+    parser.add_argument("--collection", default=os.getenv("MONGODB_COLLECTION"))
+    parser.add_argument("--index-name", default=os.getenv("MONGODB_INDEX_NAME"))
+    args = parser.parse_args()
+    ensure_vector_index(args.collection, args.index_name)
@@ -0,0 +1,313 @@
+import json
+import os
+import threading
+import uuid
+from typing import Any, Optional
+import numpy as np
+from langchain.schema import Document as LCDocument
+from vector_store.backend import VectorStoreBackend
+from logger import logger
+
+# Comparison operators of MongoDB filters supported on metadata fields
+OPERATORS = {
+    "$eq": lambda value, arg: value == arg,
+    "$ne": lambda value, arg: value != arg,
+    "$gt": lambda value, arg: value is not None and value > arg,
+    "$gte": lambda value, arg: value is not None and value >= arg,
+    "$lt": lambda value, arg: value is not None and value < arg,
+    "$lte": lambda value, arg: value is not None and value <= arg,
+    "$in": lambda value, arg: value in arg,
+    "$nin": lambda value, arg: value not in arg,
+}
+
+
+def _match_value(value: Any, condition: Any) -> bool:
+    """Match one field against a literal or an operator document; arrays match on any element."""
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for operator, arg in condition.items():
+            if operator not in OPERATORS:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+            test = OPERATORS[operator]
+            if isinstance(value, list) and operator not in ("$ne", "$nin"):
+                if not any(test(item, arg) for item in value):
+                    return False
+            elif isinstance(value, list):
+                if not all(test(item, arg) for item in value):
+                    return False
+            elif not test(value, arg):
+                return False
+        return True
+    if isinstance(value, list) and not isinstance(condition, list):
+        return condition in value
+    return value == condition
+
+
+def matches(document: dict, query: dict) -> bool:
+    """Evaluate a MongoDB-style filter (field conditions, $and, $or) against a flat document."""
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(matches(document, sub_query) for sub_query in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(document, sub_query) for sub_query in condition):
+                return False
+        elif not _match_value(document.get(key), condition):
+            return False
+    return True
+
+
+class LocalVectorBackend(VectorStoreBackend):
+    """In-process vector store persisted to a local directory.
+
+    Documents and their metadata are kept in memory next to a float32 matrix
+    of normalized embeddings. On disk under `path`, added documents are
+    appended to `documents.jsonl` and their rows to the raw `embeddings.f32`
+    matrix, so an insert writes only the new records. Deletes append a
+    tombstone line; once tombstoned rows outnumber live ones, both files are
+    rewritten without them. Search is an exact dot product over the rows that
+    pass `pre_filter`, unless `ivf_lists` is set: then the rows are clustered
+    with k-means into inverted lists and only the `nprobe` lists closest to
+    the query are scanned.
+    """
+
+    def __init__(
+        self,
+        path: str = os.getenv("LOCAL_VECTOR_STORE_PATH", ".cache/vector_store"),
+        ivf_lists: int = int(os.getenv("LOCAL_VECTOR_STORE_IVF_LISTS", "0")),
+        nprobe: int = int(os.getenv("LOCAL_VECTOR_STORE_NPROBE", "8")),
+    ) -> None:
+        """
+        Open or create the store.
+
+        Args:
+            path (str): Directory the store is persisted to.
+            ivf_lists (int): Number of IVF lists; 0 keeps search exact.
+            nprobe (int): Number of IVF lists scanned per query.
+        """
+        self.path = path
+        self.ivf_lists = ivf_lists
+        self.nprobe = nprobe
+        self._documents_path = os.path.join(path, "documents.jsonl")
+        self._embeddings_path = os.path.join(path, "embeddings.f32")
+        self._meta_path = os.path.join(path, "meta.json")
+        self._lock = threading.Lock()
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._metadata: list[dict] = []
+        self._matrix: Optional[np.ndarray] = None
+        # Row blocks added since _matrix was last concatenated
+        self._pending: list[np.ndarray] = []
+        # Rows still in the files whose documents were deleted
+        self._dead = 0
+        self.dim: Optional[int] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: list[np.ndarray] = []
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _load(self) -> None:
+        """Replay the document log and map each live document to its embedding row.
+
+        Row i of `embeddings.f32` belongs to the i-th document record. Rows are
+        written before their records, so leftovers of an insert that crashed
+        (extra rows, a trailing line without a newline) are cut off here.
+        """
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path) as file:
+            self.dim = json.load(file)["dim"]
+        records, deleted, offset = [], set(), 0
+        with open(self._documents_path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                record = json.loads(line)
+                if "_deleted" in record:
+                    deleted.update(record["_deleted"])
+                else:
+                    records.append(record)
+        row_bytes = 4 * self.dim
+        stored_rows = os.path.getsize(self._embeddings_path) // row_bytes
+        if stored_rows < len(records):
+            raise ValueError(
+                f"Local vector store at {self.path} is inconsistent: "
+                f"{len(records)} documents but {stored_rows} embeddings."
+            )
+        if os.path.getsize(self._documents_path) > offset:
+            with open(self._documents_path, "r+b") as file:
+                file.truncate(offset)
+        if os.path.getsize(self._embeddings_path) > len(records) * row_bytes:
+            with open(self._embeddings_path, "r+b") as file:
+                file.truncate(len(records) * row_bytes)
+        matrix = np.fromfile(self._embeddings_path, dtype=np.float32).reshape(len(records), self.dim)
+        live = [row for row, record in enumerate(records) if record["_id"] not in deleted]
+        self._matrix = matrix[live]
+        for row in live:
+            self._ids.append(records[row]["_id"])
+            self._texts.append(records[row]["text"])
+            self._metadata.append(records[row]["metadata"])
+        self._dead = len(records) - len(live)
+        logger.info(f"Local vector store loaded with {len(self._ids)} documents.")
+
+    @staticmethod
+    def _record_lines(ids: list[str], texts: list[str], metadata: list[dict]) -> str:
+        return "".join(
+            json.dumps({"_id": _id, "text": text, "metadata": meta}, default=str) + "\n"
+            for _id, text, meta in zip(ids, texts, metadata)
+        )
+
+    def _append(self, ids: list[str], texts: list[str], metadata: list[dict], vectors: np.ndarray) -> None:
+        """Append new rows, then their document records."""
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            open(self._documents_path, "w").close()
+            open(self._embeddings_path, "w").close()
+            # Written last: its presence marks an initialized store
+            with open(self._meta_path, "w") as file:
+                json.dump({"dim": self.dim}, file)
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the store dimension {self.dim}.")
+        with open(self._embeddings_path, "ab") as file:
+            file.write(vectors.astype(np.float32).tobytes())
+        with open(self._documents_path, "a") as file:
+            file.write(self._record_lines(ids, texts, metadata))
+
+    def _compact(self) -> None:
+        """Rewrite both files with the live documents only and swap them in."""
+        embeddings_tmp = self._embeddings_path + ".tmp"
+        documents_tmp = self._documents_path + ".tmp"
+        with open(embeddings_tmp, "wb") as file:
+            file.write(self._matrix.astype(np.float32).tobytes())
+        with open(documents_tmp, "w") as file:
+            file.write(self._record_lines(self._ids, self._texts, self._metadata))
+        os.replace(embeddings_tmp, self._embeddings_path)
+        os.replace(documents_tmp, self._documents_path)
+        self._dead = 0
+
+    def _consolidate(self) -> None:
+        """Concatenate the row blocks added since the last search or delete into _matrix."""
+        if self._pending:
+            blocks = ([self._matrix] if self._matrix is not None else []) + self._pending
+            self._matrix = np.vstack(blocks)
+            self._pending = []
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+    def add_embedded_documents(self, docs: list[LCDocument], embeddings: list[list[float]]) -> list:
+        if not docs:
+            return []
+        vectors = self._normalize(embeddings)
+        ids = [uuid.uuid4().hex for _ in docs]
+        texts = [doc.page_content for doc in docs]
+        metadata = [dict(doc.metadata) for doc in docs]
+        with self._lock:
+            self._append(ids, texts, metadata, vectors)
+            self._pending.append(vectors)
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadata.extend(metadata)
+            self._centroids = None
+        return ids
+
+    def delete_documents(self, ids: list) -> int:
+        if not ids:
+            return 0
+        to_delete = set(map(str, ids))
+        with self._lock:
+            self._consolidate()
+            keep = [i for i, _id in enumerate(self._ids) if _id not in to_delete]
+            deleted = len(self._ids) - len(keep)
+            if deleted:
+                removed = [_id for _id in self._ids if _id in to_delete]
+                self._ids = [self._ids[i] for i in keep]
+                self._texts = [self._texts[i] for i in keep]
+                self._metadata = [self._metadata[i] for i in keep]
+                self._matrix = self._matrix[keep]
+                self._centroids = None
+                self._dead += deleted
+                if self._dead > len(self._ids):
+                    self._compact()
+                else:
+                    with open(self._documents_path, "a") as file:
+                        file.write(json.dumps({"_deleted": removed}) + "\n")
+        return deleted
+
+    def facet_counts(self, field: str) -> dict:
+        counts: dict = {}
+        with self._lock:
+            for metadata in self._metadata:
+                values = metadata.get(field)
+                for value in values if isinstance(values, list) else [values]:
+                    if isinstance(value, str):
+                        counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def _build_ivf(self) -> None:
+        """Cluster the rows with spherical k-means into `ivf_lists` inverted lists."""
+        rng = np.random.default_rng(0)
+        lists = min(self.ivf_lists, len(self._matrix))
+        centroids = self._matrix[rng.choice(len(self._matrix), lists, replace=False)]
+        for _ in range(10):
+            assignment = np.argmax(self._matrix @ centroids.T, axis=1)
+            for c in range(lists):
+                members = self._matrix[assignment == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = self._normalize(centroids)
+        assignment = np.argmax(self._matrix @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._lists = [np.flatnonzero(assignment == c) for c in range(lists)]
+        logger.info(f"Local vector store built {lists} IVF lists over {len(self._matrix)} documents.")
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray:
+        """Rows to score: all of them, or the members of the nprobe closest IVF lists."""
+        if not self.ivf_lists or len(self._matrix) <= self.ivf_lists * self.nprobe:
+            return np.arange(len(self._matrix))
+        if self._centroids is None:
+            self._build_ivf()
+        closest = np.argsort(self._centroids @ query)[::-1][:self.nprobe]
+        return np.concatenate([self._lists[c] for c in closest])
+
+    def search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 5,
+        pre_filter: dict = None,
+        post_filter_pipeline: list = None,
+    ) -> list[tuple[LCDocument, float]]:
+        query = self._normalize(embedding)[0]
+        with self._lock:
+            self._consolidate()
+            if self._matrix is None or not len(self._matrix):
+                return []
+            rows = self._candidate_rows(query)
+            if pre_filter:
+                rows = np.array([row for row in rows if matches(self._metadata[row], pre_filter)], dtype=np.int64)
+                if not len(rows):
+                    return []
+            scores = (1 + self._matrix[rows] @ query) / 2
+            top = np.argsort(scores)[::-1][:k]
+            results = [
+                (
+                    LCDocument(page_content=self._texts[rows[i]], metadata={"_id": self._ids[rows[i]], **self._metadata[rows[i]]}),
+                    float(scores[i]),
+                )
+                for i in top
+            ]
+        for stage in post_filter_pipeline or []:
+            if set(stage) != {"$match"}:
+                raise ValueError(f"Local vector store only supports $match post filter stages, got {stage}.")
+            results = [(doc, score) for doc, score in results if matches({**doc.metadata, "score": score}, stage["$match"])]
+        return results